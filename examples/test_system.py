@@ -9,7 +9,7 @@ import asyncio
 import os
 import sys
 import tempfile
-from datetime import datetime
+from datetime import datetime, timedelta
 
 # Add src to path for imports
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
@@ -78,20 +78,26 @@ def test_compliance():
     
     # Test phone number normalization
     test_numbers = [
-        "555-123-4567",
-        "(555) 123-4567", 
-        "5551234567",
-        "+15551234567"
+        "212-234-5678",
+        "(212) 234-5678", 
+        "2122345678",
+        "+12122345678",
+        "(212 234-5678"
     ]
     
     for number in test_numbers:
         normalized = compliance._normalize_phone(number)
-        assert normalized == "+15551234567"
+        assert normalized == "+12122345678"
+    
+    # Numbers phonenumbers rejects are rejected on the fast path too
+    assert compliance._normalize_phone("0000000000") is None
+    assert compliance._normalize_phone("1-111-111-1111") is None
+    assert compliance._normalize_phone("555-234-5678") is None
     
     print(f"✅ Phone normalization works")
     
     # Test opt-out functionality
-    test_phone = "+15551234567"
+    test_phone = "+12122345678"
     
     # Should be able to contact initially
     can_contact_before = compliance.can_contact(test_phone)
@@ -188,23 +194,100 @@ def test_campaign_templates():
     print(f"✅ Message templates have placeholders")
     print(f"✅ Campaign template tests passed!")
 
+def test_agent_state_counters():
+    """Test per-day communication counters and agent visit tracking"""
+    print("\n🧮 Testing Agent State Counters...")
+    
+    from schemas.agent_state import (
+        create_initial_state, add_communication_attempt,
+        refresh_communication_counters, record_agent_visit
+    )
+    
+    state = create_initial_state(
+        lead_id="test-lead",
+        lead_name="John Doe",
+        property_address="123 Main St",
+        property_type="fix_flip",
+        campaign_id="test-campaign",
+        lead_phone="+15552345678"
+    )
+    
+    # Counters go up per method, and failures record a timestamp
+    add_communication_attempt(state, "sms", "Hi John", True)
+    add_communication_attempt(state, "sms", "Following up", False, error="undeliverable")
+    add_communication_attempt(state, "email", "Hello", True)
+    
+    today = datetime.now().date().isoformat()
+    assert state["counters_day"] == today
+    assert state["sms_count_today"] == 2
+    assert state["email_count_today"] == 1
+    assert state["last_sms_failure_ts"] is not None
+    assert state["last_email_failure_ts"] is None
+    
+    print(f"✅ Counters increment per method")
+    
+    # Rolling over to the next day resets the counts but keeps failure times
+    last_sms_failure = state["last_sms_failure_ts"]
+    tomorrow = datetime.now() + timedelta(days=1)
+    refresh_communication_counters(state, tomorrow)
+    
+    assert state["counters_day"] == tomorrow.date().isoformat()
+    assert state["sms_count_today"] == 0
+    assert state["email_count_today"] == 0
+    assert state["last_sms_failure_ts"] == last_sms_failure
+    
+    print(f"✅ Counters roll over at day change")
+    
+    # State from before the counters existed is rebuilt from its history
+    for key in ("counters_day", "sms_count_today", "email_count_today",
+                "last_sms_failure_ts", "last_email_failure_ts"):
+        del state[key]
+    refresh_communication_counters(state)
+    
+    assert state["counters_day"] == today
+    assert state["sms_count_today"] == 2
+    assert state["email_count_today"] == 1
+    assert state["last_sms_failure_ts"] == last_sms_failure
+    assert state["last_email_failure_ts"] is None
+    
+    print(f"✅ Counters rebuild from history")
+    
+    # Each agent is recorded once, in first-visit order
+    for agent_name in ["supervisor", "sms_agent", "supervisor", "fix_flip_agent", "sms_agent"]:
+        record_agent_visit(state, agent_name)
+    
+    assert state["agent_history"] == ["supervisor", "sms_agent", "fix_flip_agent"]
+    
+    # State built before agent_history_set existed
+    del state["agent_history_set"]
+    record_agent_visit(state, "sms_agent")
+    record_agent_visit(state, "booking_agent")
+    
+    assert state["agent_history"] == ["supervisor", "sms_agent", "fix_flip_agent", "booking_agent"]
+    assert state["agent_history_set"] == set(state["agent_history"])
+    
+    print(f"✅ Agent visits are deduplicated")
+    print(f"✅ Agent state counter tests passed!")
+
 async def run_all_tests():
     """Run all tests"""
     print("🧪 AI Real Estate Outreach Agent - System Tests")
     print("=" * 50)
     
     try:
-        # Test models
-        test_lead_models()
-        
-        # Test compliance
-        test_compliance()
-        
-        # Test database
-        await test_database()
+        # Tests are independent - run the sync ones in threads alongside the database test
+        results = await asyncio.gather(
+            asyncio.to_thread(test_lead_models),
+            asyncio.to_thread(test_compliance),
+            test_database(),
+            asyncio.to_thread(test_campaign_templates),
+            asyncio.to_thread(test_agent_state_counters),
+            return_exceptions=True
+        )
         
-        # Test campaign templates
-        test_campaign_templates()
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
         
         print(f"\n🎉 All tests passed!")
         print(f"✅ System is ready for use")
@@ -221,46 +304,39 @@ def check_environment():
     """Check if environment is properly configured"""
     print("\n🔍 Checking Environment Configuration...")
     
-    required_for_full_functionality = [
+    required_for_full_functionality = {
         "OPENAI_API_KEY",
-        "TWILIO_ACCOUNT_SID", 
-        "TWILIO_AUTH_TOKEN",
-        "TWILIO_PHONE_NUMBER",
-        "CALENDLY_API_TOKEN",
-        "CALENDLY_USER_URI"
-    ]
-    
-    optional_vars = [
+        "TELNYX_API_KEY",
+        "TELNYX_MESSAGING_PROFILE_ID",
+        "TELNYX_PHONE_NUMBER",
+        "GMAIL_ADDRESS",
+        "GMAIL_APP_PASSWORD",
+        "GOOGLE_SERVICE_ACCOUNT_KEY"
+    }
+    
+    optional_vars = {
         "PROPWIRE_API_KEY",
         "SKIPTRACE_API_KEY", 
         "DNC_API_KEY"
-    ]
-    
-    configured_required = []
-    configured_optional = []
-    
-    for var in required_for_full_functionality:
-        if os.getenv(var):
-            configured_required.append(var)
+    }
     
-    for var in optional_vars:
-        if os.getenv(var):
-            configured_optional.append(var)
+    configured_required = {var for var in required_for_full_functionality if os.getenv(var)}
+    configured_optional = {var for var in optional_vars if os.getenv(var)}
+    missing_required = required_for_full_functionality - configured_required
     
     print(f"Required APIs configured: {len(configured_required)}/{len(required_for_full_functionality)}")
-    for var in configured_required:
+    for var in sorted(configured_required):
         print(f"  ✅ {var}")
     
-    for var in required_for_full_functionality:
-        if var not in configured_required:
-            print(f"  ❌ {var} (missing)")
+    for var in sorted(missing_required):
+        print(f"  ❌ {var} (missing)")
     
     if configured_optional:
         print(f"\nOptional APIs configured:")
-        for var in configured_optional:
+        for var in sorted(configured_optional):
             print(f"  ✅ {var}")
     
-    if len(configured_required) == len(required_for_full_functionality):
+    if not missing_required:
         print(f"\n🎉 All required APIs configured! System ready for production.")
     else:
         print(f"\n⚠️  Some APIs missing. System will work in limited mode.")
@@ -5,8 +5,7 @@ Expose your local server to receive Telnyx webhooks
 
 import subprocess
 import time
-import requests
-import json
+import httpx
 
 def setup_ngrok_webhook():
     """Set up ngrok tunnel and configure Telnyx webhook"""
@@ -39,12 +38,25 @@ def setup_ngrok_webhook():
         )
         
         print("⏳ Waiting for ngrok to start...")
-        time.sleep(3)
         
-        # Get ngrok URL
+        # Get ngrok URL - poll with backoff instead of a fixed wait
         try:
-            response = requests.get('http://localhost:4040/api/tunnels')
-            tunnels = response.json()
+            tunnels = {'tunnels': []}
+            last_error = None
+            
+            with httpx.Client(timeout=1) as client:
+                for delay in (0.1, 0.2, 0.4, 0.8, 1.5):
+                    try:
+                        response = client.get('http://localhost:4040/api/tunnels')
+                        tunnels = response.json()
+                        if tunnels['tunnels']:
+                            break
+                    except httpx.HTTPError as e:
+                        last_error = e
+                    time.sleep(delay)
+            
+            if not tunnels['tunnels'] and last_error:
+                raise last_error
             
             if tunnels['tunnels']:
                 public_url = tunnels['tunnels'][0]['public_url']
@@ -83,12 +95,14 @@ def add_webhook_endpoint():
     
     webhook_code = '''
 # Add this webhook endpoint to handle incoming SMS
+import orjson
+
 @app.post("/webhooks/telnyx")
 async def telnyx_webhook(request: Request):
     """Handle incoming Telnyx webhooks (SMS messages)"""
     try:
         payload = await request.body()
-        data = json.loads(payload)
+        data = orjson.loads(payload)
         
         print(f"📱 Received webhook: {data}")
         
@@ -1,24 +1,37 @@
-# LangGraph Agents
-try:
-    from .base_agent import BaseRealEstateAgent, ComplianceChecker
-    from .supervisor_agent import SupervisorAgent, supervisor_agent_node
-    from .communication_router import CommunicationRouterAgent, communication_router_node
-    
-    __all__ = [
-        "BaseRealEstateAgent", 
-        "ComplianceChecker",
-        "SupervisorAgent", 
-        "supervisor_agent_node",
-        "CommunicationRouterAgent", 
-        "communication_router_node"
-    ]
-except ImportError as e:
-    print(f"Warning: Could not import LangGraph agents: {e}")
-    __all__ = []
+# LangGraph Agents - resolved lazily on first access (PEP 562) so importing one agent
+# submodule doesn't pull in every agent and its LLM/Google dependencies
+import importlib
 
-# Legacy agents (if needed)
-try:
-    from .conversation_agent import ConversationAgent
-    __all__.append("ConversationAgent")
-except ImportError:
-    pass
+_LAZY = {
+    "BaseRealEstateAgent": ".base_agent",
+    "ComplianceChecker": ".base_agent",
+    "SupervisorAgent": ".supervisor_agent",
+    "supervisor_agent_node": ".supervisor_agent",
+    "CommunicationRouterAgent": ".communication_router",
+    "communication_router_node": ".communication_router",
+    # Legacy agents (if needed)
+    "ConversationAgent": ".conversation_agent",
+}
+
+__all__ = [
+    "BaseRealEstateAgent",
+    "ComplianceChecker",
+    "SupervisorAgent",
+    "supervisor_agent_node",
+    "CommunicationRouterAgent",
+    "communication_router_node"
+]
+
+def __getattr__(name):
+    module_name = _LAZY.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    try:
+        module = importlib.import_module(module_name, __name__)
+    except ImportError as e:
+        raise AttributeError(f"Could not import {name} from {__name__}: {e}") from e
+
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
@@ -4,22 +4,163 @@ Provides common functionality for all agent types
 """
 
 import os
+import re
 import sqlite3
+import queue
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, List
+from contextlib import contextmanager
+from functools import lru_cache
+from types import MappingProxyType
+from zoneinfo import ZoneInfo
+from typing import Dict, Any, Optional, List, Set
 from datetime import datetime
 import logging
 
-from langchain_core.messages import HumanMessage, AIMessage
-from langchain_openai import ChatOpenAI
+from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from langchain_core.rate_limiters import InMemoryRateLimiter
 
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+try:
+    from langgraph.graph import Command
+except ImportError:
+    # Command is only available in newer langgraph releases
+    Command = None
 
 from schemas.agent_state import RealEstateAgentState, update_state_timestamp
 
 
+@lru_cache(maxsize=32)
+def _tz(name: str) -> ZoneInfo:
+    """Timezone lookup, resolved once per name"""
+    return ZoneInfo(name)
+
+_UPDATE_LEAD_STATUS_SQL = "UPDATE leads SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?"
+_TOUCH_ACTIVE_CONVERSATION_SQL = "UPDATE conversations SET updated_at = CURRENT_TIMESTAMP WHERE lead_id = ? AND status = 'active'"
+
+# Conversation history messages sent with each generated reply
+CONTEXT_WINDOW_MESSAGES = 10
+
+# Process-wide token bucket for OpenAI requests: bursts of concurrent leads are paced under the
+# account's RPM limit (default 8/s = 480 RPM) instead of failing with 429s and retrying
+OPENAI_RATE_LIMITER = InMemoryRateLimiter(
+    requests_per_second=float(os.getenv("OPENAI_REQUESTS_PER_SECOND", "8")),
+    check_every_n_seconds=0.05,
+    max_bucket_size=int(os.getenv("OPENAI_MAX_BURST", "16"))
+)
+
+@lru_cache(maxsize=8)
+def _shared_llm(model: str, temperature: float, api_key: str):
+    """One ChatOpenAI client (and HTTP connection pool) per model config, shared by all agents"""
+    # Imported here so agents running without OpenAI don't pay for the client import
+    from langchain_openai import ChatOpenAI
+    
+    return ChatOpenAI(
+        model=model,
+        temperature=temperature,
+        api_key=api_key,
+        rate_limiter=OPENAI_RATE_LIMITER
+    )
+
+# Applied once to every pooled connection
+_DB_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA cache_size=-20000",
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+class SQLiteConnectionPool:
+    """
+    Per-process SQLite connections opened once: a set of reader connections and one writer
+    """
+    
+    def __init__(self, db_path: str, size: Optional[int] = None):
+        self.db_path = db_path
+        self._readers: "queue.Queue[sqlite3.Connection]" = queue.Queue(maxsize=size or os.cpu_count() or 4)
+        self._writer: Optional[sqlite3.Connection] = None
+        self._write_lock = threading.Lock()
+    
+    def _open(self) -> sqlite3.Connection:
+        # Connections move between executor threads, but only one thread holds a connection at a time
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for pragma in _DB_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
+    @contextmanager
+    def read(self):
+        """Borrow a reader connection"""
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            conn = self._open()
+        
+        try:
+            yield conn
+        finally:
+            try:
+                self._readers.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+    
+    @contextmanager
+    def write(self):
+        """Hold the single writer connection"""
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = self._open()
+            yield self._writer
+
+
+_DB_POOLS: Dict[str, SQLiteConnectionPool] = {}
+_DB_POOLS_LOCK = threading.Lock()
+
+def get_db_pool(db_path: str = "agent_estate.db") -> SQLiteConnectionPool:
+    """Get the process-wide connection pool for a database file"""
+    with _DB_POOLS_LOCK:
+        if db_path not in _DB_POOLS:
+            _DB_POOLS[db_path] = SQLiteConnectionPool(db_path)
+        return _DB_POOLS[db_path]
+
+# Keywords for the rule-based message analysis, tagged with the (category, label) they signal
+_ANALYSIS_KEYWORDS = MappingProxyType({
+    "yes": ("intent", "interested"),
+    "interested": ("intent", "interested"),
+    "sure": ("intent", "interested"),
+    "ok": ("intent", "interested"),
+    "sounds good": ("intent", "interested"),
+    "no": ("intent", "not_interested"),
+    # Explicit rejection phrases - these contain or follow interest words, so they outrank them
+    "not interested": ("rejection", "not_interested"),
+    "not now": ("rejection", "not_interested"),
+    "stop": ("intent", "not_interested"),
+    "remove": ("intent", "not_interested"),
+    "book": ("intent", "ready_to_book"),
+    "schedule": ("intent", "ready_to_book"),
+    "call": ("intent", "ready_to_book"),
+    "appointment": ("intent", "ready_to_book"),
+    "great": ("sentiment", "positive"),
+    "awesome": ("sentiment", "positive"),
+    "perfect": ("sentiment", "positive"),
+    "excellent": ("sentiment", "positive"),
+    "bad": ("sentiment", "negative"),
+    "terrible": ("sentiment", "negative"),
+    "awful": ("sentiment", "negative"),
+    "hate": ("sentiment", "negative"),
+})
+
+# Single scan over the message; the lookahead reports a keyword at every position, so overlapping
+# keywords ("not interested" / "interested") are all seen. Keywords only match as whole words
+# ("no" is not found in "know" or "noble", "ok" not in "book").
+_ANALYSIS_PATTERN = re.compile(
+    r"(?=\b(" + "|".join(re.escape(keyword) for keyword in sorted(_ANALYSIS_KEYWORDS, key=len, reverse=True)) + r")\b)"
+)
+
+
 class BaseRealEstateAgent(ABC):
     """
     Base class for all Real Estate agents in the LangGraph system
@@ -32,11 +173,7 @@ class BaseRealEstateAgent(ABC):
         # Initialize OpenAI client
         openai_api_key = os.getenv("OPENAI_API_KEY")
         if openai_api_key and openai_api_key != "test-key":
-            self.llm = ChatOpenAI(
-                model="gpt-4o-mini",
-                temperature=0.3,
-                api_key=openai_api_key
-            )
+            self.llm = _shared_llm("gpt-4o-mini", 0.3, openai_api_key)
             self.openai_available = True
         else:
             self.llm = None
@@ -46,87 +183,56 @@ class BaseRealEstateAgent(ABC):
         # Database connection
         self.db_path = "agent_estate.db"
     
-    def get_db_connection(self) -> sqlite3.Connection:
-        """Get database connection"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+    def get_db_connection(self, write: bool = False):
+        """Borrow a pooled database connection (use as a context manager)"""
+        pool = get_db_pool(self.db_path)
+        return pool.write() if write else pool.read()
     
     def log_agent_action(self, state: RealEstateAgentState, action: str, details: Dict[str, Any] = None):
         """Log agent actions for debugging and analytics"""
-        self.logger.info(f"Agent {self.agent_name} - Lead {state['lead_id']} - {action}")
-        if details:
-            self.logger.debug(f"Details: {details}")
+        agent_name = self.agent_name
+        lead_id = state["lead_id"]
+        log_fields = {"agent": agent_name, "lead_id": lead_id, "action": action}
+        self.logger.info("Agent %s - Lead %s - %s", agent_name, lead_id, action, extra=log_fields)
+        if details and self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Details: %r", details, extra={**log_fields, "details": details})
     
     def update_conversation_in_db(self, state: RealEstateAgentState):
         """Update conversation state in database"""
-        conn = self.get_db_connection()
-        try:
-            # Update lead status
-            conn.execute("""
-                UPDATE leads 
-                SET status = ?, updated_at = CURRENT_TIMESTAMP 
-                WHERE id = ?
-            """, (state["conversation_stage"], state["lead_id"]))
-            
-            # Update conversation
-            conn.execute("""
-                UPDATE conversations 
-                SET updated_at = CURRENT_TIMESTAMP 
-                WHERE lead_id = ? AND status = 'active'
-            """, (state["lead_id"],))
-            
-            conn.commit()
-        except Exception as e:
-            self.logger.error(f"Failed to update conversation in DB: {e}")
-        finally:
-            conn.close()
+        with self.get_db_connection(write=True) as conn:
+            try:
+                # One write transaction for both updates; take the write lock up front
+                with conn:
+                    conn.execute("BEGIN IMMEDIATE")
+                    conn.execute(_UPDATE_LEAD_STATUS_SQL, (state["conversation_stage"], state["lead_id"]))
+                    conn.execute(_TOUCH_ACTIVE_CONVERSATION_SQL, (state["lead_id"],))
+            except Exception as e:
+                self.logger.error("Failed to update conversation in DB: %s", e)
     
     def analyze_user_message(self, message: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         Analyze user message for intent, sentiment, and information extraction
         """
-        # If OpenAI is not available, return basic analysis
-        if not self.openai_available:
-            self.logger.info("OpenAI not available, using basic message analysis")
-            return self._basic_message_analysis(message, context)
-        
-        prompt = f"""
-        Analyze this user message from a real estate lead:
-        
-        Message: "{message}"
-        Context: {context or {}}
-        
-        Extract and return:
-        1. Intent (interested, not_interested, question, objection, ready_to_book, need_info)
-        2. Sentiment (positive, neutral, negative)
-        3. Communication style (formal, casual, neutral)
-        4. Any specific information mentioned (price, timeline, condition, etc.)
-        5. Urgency level (low, medium, high)
-        
-        Return as JSON format.
-        """
-        
-        try:
-            response = self.llm.invoke([HumanMessage(content=prompt)])
-            # Parse the response - in production, you'd want more robust parsing
-            return {"intent": "interested", "sentiment": "positive", "style": "casual"}
-        except Exception as e:
-            self.logger.error(f"Failed to analyze message: {e}")
-            return self._basic_message_analysis(message, context)
+        # Rule-based analysis only - the LLM analysis prompt was never parsed (it returned a fixed
+        # stub), so it cost a round-trip per message for nothing. Add JSON-mode parsing before
+        # routing this through the LLM again.
+        return self._basic_message_analysis(message, context)
     
     def _basic_message_analysis(self, message: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         Basic message analysis without OpenAI
         """
-        message_lower = message.lower()
+        tags = {_ANALYSIS_KEYWORDS[match.group(1)] for match in _ANALYSIS_PATTERN.finditer(message.lower())}
         
-        # Basic intent detection
-        if any(word in message_lower for word in ["yes", "interested", "sure", "ok", "sounds good"]):
+        # Basic intent detection - interest wins over a bare "no" ("yes, no problem"), but not over
+        # an explicit rejection phrase ("not interested")
+        if ("rejection", "not_interested") in tags:
+            intent = "not_interested"
+        elif ("intent", "interested") in tags:
             intent = "interested"
-        elif any(word in message_lower for word in ["no", "not interested", "stop", "remove"]):
+        elif ("intent", "not_interested") in tags:
             intent = "not_interested"
-        elif any(word in message_lower for word in ["book", "schedule", "call", "appointment"]):
+        elif ("intent", "ready_to_book") in tags:
             intent = "ready_to_book"
         elif "?" in message:
             intent = "question"
@@ -134,9 +240,9 @@ class BaseRealEstateAgent(ABC):
             intent = "unknown"
         
         # Basic sentiment detection
-        if any(word in message_lower for word in ["great", "awesome", "perfect", "excellent"]):
+        if ("sentiment", "positive") in tags:
             sentiment = "positive"
-        elif any(word in message_lower for word in ["bad", "terrible", "awful", "hate"]):
+        elif ("sentiment", "negative") in tags:
             sentiment = "negative"
         else:
             sentiment = "neutral"
@@ -154,17 +260,25 @@ class BaseRealEstateAgent(ABC):
         """
         max_messages = 20
         max_days = 30
+        lead_id = state["lead_id"]
         
         if state["total_messages_sent"] >= max_messages:
-            self.logger.warning(f"Lead {state['lead_id']} reached max messages limit")
+            self.logger.warning(
+                "Lead %s reached max messages limit", lead_id,
+                extra={"agent": self.agent_name, "lead_id": lead_id, "limit": "max_messages"}
+            )
             return False
         
-        # Check time limits
-        started_at = datetime.fromisoformat(state["conversation_started_at"])
-        days_elapsed = (datetime.now() - started_at).days
+        # Check time limits (states created before the epoch field existed only carry the ISO string)
+        started_epoch = state.get("conversation_started_epoch")
+        if started_epoch is None:
+            started_epoch = datetime.fromisoformat(state["conversation_started_at"]).timestamp()
         
-        if days_elapsed >= max_days:
-            self.logger.warning(f"Lead {state['lead_id']} reached max time limit")
+        if time.time() - started_epoch >= max_days * 86400:
+            self.logger.warning(
+                "Lead %s reached max time limit", lead_id,
+                extra={"agent": self.agent_name, "lead_id": lead_id, "limit": "max_days"}
+            )
             return False
         
         return True
@@ -173,15 +287,59 @@ class BaseRealEstateAgent(ABC):
         """
         Determine if conversation should be escalated to human agent
         """
-        escalation_triggers = [
-            state["retry_count"] > 3,
-            len(state["objections_handled"]) > 5,
-            state["conversation_sentiment"] == "negative",
-            "legal" in str(state.get("last_error", "")).lower(),
-            state["booking_attempts"] > 3
+        # Cheapest checks first; return on the first trigger
+        if state["retry_count"] > 3:
+            return True
+        if state["booking_attempts"] > 3:
+            return True
+        if state["conversation_sentiment"] == "negative":
+            return True
+        if len(state["objections_handled"]) > 5:
+            return True
+        
+        last_error_lc = state.get("last_error_lc")
+        if last_error_lc is None and state.get("last_error"):
+            # Error set by code that predates last_error_lc
+            last_error_lc = str(state["last_error"]).lower()
+        return bool(last_error_lc) and "legal" in last_error_lc
+    
+    def _build_reply_context(
+        self, 
+        state: RealEstateAgentState, 
+        user_message: str,
+        system_prompt: str
+    ) -> List[Any]:
+        """
+        Build the LLM messages for a reply
+        """
+        # Build conversation context: system prompt, recent history, current user message.
+        # The system prompt goes first as a SystemMessage so the prompt prefix stays byte-identical
+        # across turns and OpenAI's prompt cache can reuse it; keep per-lead facts out of it.
+        return [
+            SystemMessage(content=system_prompt),
+            *state["messages"][-CONTEXT_WINDOW_MESSAGES:],
+            HumanMessage(content=user_message)
         ]
+    
+    def _log_prompt_cache_usage(self, state: RealEstateAgentState, response) -> None:
+        """
+        Log how many prompt tokens OpenAI served from its prompt cache (prefixes of 1024+ tokens)
+        """
+        token_usage = response.response_metadata.get("token_usage") or {}
+        prompt_tokens = token_usage.get("prompt_tokens")
+        if prompt_tokens is None:
+            return
         
-        return any(escalation_triggers)
+        cached_tokens = (token_usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0)
+        self.logger.debug(
+            "LLM prompt tokens: %s (%s cached)", prompt_tokens, cached_tokens,
+            extra={
+                "agent": self.agent_name,
+                "lead_id": state["lead_id"],
+                "prompt_tokens": prompt_tokens,
+                "cached_tokens": cached_tokens
+            }
+        )
     
     def generate_response_with_context(
         self, 
@@ -196,24 +354,14 @@ class BaseRealEstateAgent(ABC):
         if not self.openai_available:
             return self._generate_basic_response(state, user_message)
         
-        # Build conversation context
-        context_messages = []
-        
-        # Add system prompt
-        context_messages.append(HumanMessage(content=system_prompt))
-        
-        # Add recent conversation history
-        recent_messages = state["messages"][-10:]  # Last 10 messages
-        context_messages.extend(recent_messages)
-        
-        # Add current user message
-        context_messages.append(HumanMessage(content=user_message))
+        context_messages = self._build_reply_context(state, user_message, system_prompt)
         
         try:
             response = self.llm.invoke(context_messages)
+            self._log_prompt_cache_usage(state, response)
             return response.content
         except Exception as e:
-            self.logger.error(f"Failed to generate response: {e}")
+            self.logger.error("Failed to generate response: %s", e)
             return self._generate_basic_response(state, user_message)
     
     def _generate_basic_response(self, state: RealEstateAgentState, user_message: str) -> str:
@@ -246,9 +394,15 @@ class BaseRealEstateAgent(ABC):
         Handle errors gracefully and update state
         """
         error_message = str(error)
-        self.logger.error(f"Agent {self.agent_name} error for lead {state['lead_id']}: {error_message}")
+        agent_name = self.agent_name
+        lead_id = state["lead_id"]
+        self.logger.error(
+            "Agent %s error for lead %s: %s", agent_name, lead_id, error_message,
+            extra={"agent": agent_name, "lead_id": lead_id, "error": error_message}
+        )
         
         state["last_error"] = error_message
+        state["last_error_lc"] = error_message.lower()
         state["retry_count"] += 1
         
         return update_state_timestamp(state)
@@ -257,7 +411,8 @@ class BaseRealEstateAgent(ABC):
         """
         Create command to hand off to another agent
         """
-        from langgraph.graph import Command
+        if Command is None:
+            raise ImportError("langgraph.graph.Command is not available in the installed langgraph version")
         
         return Command(
             goto=target_agent,
@@ -265,6 +420,16 @@ class BaseRealEstateAgent(ABC):
         )
 
 
+# timezone -> (time bucket, quiet hours ok)
+QUIET_HOURS_CACHE_SECONDS = 10
+_QUIET_HOURS_CACHE: Dict[str, tuple] = {}
+
+# Phone numbers already confirmed as opted out. Opt-outs are never withdrawn, so a hit can skip
+# the query; a miss always goes to the database, which stays the source of truth.
+_OPT_OUT_NUMBERS: Set[str] = set()
+_OPT_OUT_LOCK = threading.Lock()
+
+
 class ComplianceChecker:
     """
     Utility class for compliance checking
@@ -275,17 +440,24 @@ class ComplianceChecker:
     
     def check_quiet_hours(self, timezone: str = "America/New_York") -> bool:
         """Check if current time respects quiet hours (8 AM - 9 PM)"""
-        import pytz
-        
         try:
-            tz = pytz.timezone(timezone)
-            local_time = datetime.now(tz)
-            hour = local_time.hour
+            hour = datetime.now(_tz(timezone)).hour
             return 8 <= hour <= 21
         except Exception as e:
-            self.logger.error(f"Failed to check quiet hours: {e}")
+            self.logger.error("Failed to check quiet hours: %s", e, extra={"check": "quiet_hours", "timezone": timezone})
             return False
     
+    def _cached_quiet_hours(self, timezone: str) -> bool:
+        """Quiet-hours result for the timezone, recomputed at most every QUIET_HOURS_CACHE_SECONDS"""
+        bucket = int(time.time() // QUIET_HOURS_CACHE_SECONDS)
+        cached = _QUIET_HOURS_CACHE.get(timezone)
+        if cached is not None and cached[0] == bucket:
+            return cached[1]
+        
+        quiet_hours_ok = self.check_quiet_hours(timezone)
+        _QUIET_HOURS_CACHE[timezone] = (bucket, quiet_hours_ok)
+        return quiet_hours_ok
+    
     def check_dnc_status(self, phone_number: str) -> Dict[str, Any]:
         """
         DNC check disabled - leads are pre-screened
@@ -302,18 +474,25 @@ class ComplianceChecker:
         """
         Check if user has opted out
         """
-        conn = sqlite3.connect("agent_estate.db")
-        try:
-            result = conn.execute("""
-                SELECT COUNT(*) FROM opt_outs 
-                WHERE phone_number = ?
-            """, (phone_number,)).fetchone()
-            return result[0] > 0
-        except Exception as e:
-            self.logger.error(f"Failed to check opt-out status: {e}")
-            return False
-        finally:
-            conn.close()
+        # Fast path: numbers already seen as opted out need no query
+        if phone_number in _OPT_OUT_NUMBERS:
+            return True
+        
+        with get_db_pool().read() as conn:
+            try:
+                # Always returns exactly one row; room for further compliance signals in the same round-trip
+                result = conn.execute("""
+                    SELECT EXISTS(SELECT 1 FROM opt_outs WHERE phone_number = ?) AS opted_out
+                """, (phone_number,)).fetchone()
+                opted_out = bool(result["opted_out"])
+            except Exception as e:
+                self.logger.error("Failed to check opt-out status: %s", e, extra={"check": "opt_out"})
+                return False
+        
+        if opted_out:
+            with _OPT_OUT_LOCK:
+                _OPT_OUT_NUMBERS.add(phone_number)
+        return opted_out
     
     def is_compliant_to_contact(
         self, 
@@ -324,8 +503,8 @@ class ComplianceChecker:
         """
         Comprehensive compliance check
         """
-        # Check quiet hours
-        quiet_hours_ok = self.check_quiet_hours(timezone)
+        # Check quiet hours (shared across a burst of contact decisions)
+        quiet_hours_ok = self._cached_quiet_hours(timezone)
         
         # Check opt-out status if phone provided
         opt_out_status = False
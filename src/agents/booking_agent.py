@@ -4,24 +4,240 @@ Handles appointment scheduling and calendar management
 """
 
 import os
-import sys
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from typing import Dict, Any, Optional, List
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import lru_cache, partial
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime, timedelta
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import base64
 from email.mime.text import MIMEText
 
-from agents.base_agent import BaseRealEstateAgent
+from agents.base_agent import BaseRealEstateAgent, ComplianceChecker, get_db_pool
 from schemas.agent_state import (
     RealEstateAgentState, 
     update_state_timestamp,
-    advance_conversation_stage
+    advance_conversation_stage,
+    record_agent_visit
+)
+
+# calendar_id -> (fetched_at monotonic, window days, busy starts, busy ends) with busy periods
+# already parsed to epoch seconds. Module level because a BookingAgent is constructed per
+# graph step; every SMS in the booking flow reads availability.
+FREEBUSY_CACHE_SECONDS = 60
+FREEBUSY_PREFETCH_DAYS = 7
+_FREEBUSY_CACHE: Dict[str, Tuple[float, int, np.ndarray, np.ndarray]] = {}
+
+
+def _parse_busy_periods(busy_times: List[Dict[str, str]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Parse freebusy periods into int64 arrays of start and end epoch seconds"""
+    starts = np.empty(len(busy_times), dtype=np.int64)
+    ends = np.empty(len(busy_times), dtype=np.int64)
+    
+    for index, period in enumerate(busy_times):
+        starts[index] = datetime.fromisoformat(period['start'].replace('Z', '+00:00')).timestamp()
+        ends[index] = datetime.fromisoformat(period['end'].replace('Z', '+00:00')).timestamp()
+    
+    return starts, ends
+
+
+def invalidate_freebusy_cache(calendar_id: Optional[str] = None):
+    """Drop cached busy periods for one calendar, or for all calendars"""
+    if calendar_id is None:
+        _FREEBUSY_CACHE.clear()
+    else:
+        _FREEBUSY_CACHE.pop(calendar_id, None)
+
+
+# Calendar inserts (with Meet provisioning) and confirmation emails run here so an SMS reply
+# waits at most MEET_LINK_WAIT_SECONDS on Google before going out
+MEET_LINK_WAIT_SECONDS = 2
+_BOOKING_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="booking")
+
+# A booking text that lands in quiet hours is retried on this interval until contact is allowed
+SMS_DEFER_SECONDS = 15 * 60
+
+# Keep-alive session for the Calendly API so repeated lookups reuse the TCP/TLS connection
+_calendly_http: Optional[requests.Session] = None
+
+
+def _get_calendly_http() -> requests.Session:
+    """Get the shared Calendly HTTP session, creating it on first use"""
+    global _calendly_http
+    
+    if _calendly_http is None:
+        session = requests.Session()
+        session.headers.update({"Content-Type": "application/json"})
+        session.mount("https://", HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=8,
+            max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=(502, 503, 504))
+        ))
+        _calendly_http = session
+    
+    return _calendly_http
+
+
+# EmailAgent used for booking confirmations, built on first use and shared across BookingAgents
+_email_agent = None
+_email_agent_lock = threading.Lock()
+
+# SMS service for messages sent after the graph step has returned (pending booking outcomes);
+# False once construction has failed so an unconfigured Telnyx isn't retried on every booking
+_sms_service = None
+_sms_service_lock = threading.Lock()
+
+
+@lru_cache(maxsize=2)
+def _load_calendar_credentials(service_account_key: Optional[str], credentials_path: Optional[str]):
+    """
+    Parse the service account credentials once per process; they are shared by every BookingAgent
+    so the token refresh is shared too. (The discovery service itself is built per agent and per
+    booking worker because its httplib2 transport is not thread-safe.)
+    """
+    from google.oauth2.service_account import Credentials
+    
+    if service_account_key:
+        # Use service account key
+        return Credentials.from_service_account_info(
+            json.loads(service_account_key),
+            scopes=['https://www.googleapis.com/auth/calendar']
+        )
+    
+    # Use credentials file
+    return Credentials.from_service_account_file(
+        credentials_path,
+        scopes=['https://www.googleapis.com/auth/calendar']
+    )
+
+
+def _build_calendar_service(service_account_key: Optional[str], credentials_path: Optional[str]):
+    """Build a Calendar discovery client; each one must stay on the thread that uses it"""
+    from googleapiclient.discovery import build
+    
+    return build(
+        'calendar', 'v3',
+        credentials=_load_calendar_credentials(service_account_key, credentials_path),
+        static_discovery=True,  # bundled discovery document, no fetch
+        cache_discovery=False
+    )
+
+
+# Calendar clients for the booking executor's worker threads, built on each worker's first insert
+_worker_calendar = threading.local()
+
+
+def _create_meet_event_on_worker(agent: "BookingAgent", event: Dict[str, Any], meeting_datetime: datetime) -> Dict[str, Any]:
+    """
+    Insert a prepared Meet event from a booking worker, using that worker's own Calendar client;
+    the agent's client keeps serving its owning thread while the insert runs
+    """
+    try:
+        credentials_key = (agent.google_service_account_key, agent.google_calendar_credentials)
+        services = getattr(_worker_calendar, "services", None)
+        if services is None:
+            services = _worker_calendar.services = {}
+        calendar_service = services.get(credentials_key)
+        if calendar_service is None:
+            calendar_service = services[credentials_key] = _build_calendar_service(*credentials_key)
+    except Exception as e:
+        agent.logger.error(f"Failed to create Google Meet event: {e}")
+        return {"success": False, "error": str(e)}
+    
+    return agent._insert_meet_event(calendar_service, event, meeting_datetime)
+
+
+# Time selection parsing: day words (in match priority order) with their weekday/day offset,
+# one alternation over all of them, and one time-of-day pattern ("2pm", "2 pm", "2:30 pm", "230pm").
+# Both are matched against the lowercased message, so neither needs re.I.
+_DAY_OFFSET = {
+    'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3,
+    'friday': 4, 'saturday': 5, 'sunday': 6,
+    'tomorrow': 1, 'today': 0
+}
+_DAY_PRIORITY = {day_name: rank for rank, day_name in enumerate(_DAY_OFFSET)}
+_DAY_RE = re.compile('|'.join(_DAY_OFFSET))
+_TIME_RE = re.compile(r'(\d{1,2}):?(\d{0,2})\s*(am|pm)')
+
+# Exact date-time replies (e.g. picked from a calendar UI) parsed with strptime before the
+# day/time heuristics
+_FAST_FORMATS = (
+    "%Y-%m-%dT%H:%M",
+    "%Y-%m-%d %H:%M",
+    "%Y-%m-%d %I:%M %p",
+    "%m/%d/%Y %I:%M %p",
+    "%m/%d/%Y %I %p",
 )
 
 
+# Default availability only changes at midnight, so it is built once per day (keyed by date ordinal)
+@lru_cache(maxsize=4)
+def _default_availability_slots(today_ordinal: int) -> Tuple[Dict[str, Any], ...]:
+    """Default slots for the three days after the given date"""
+    slots = []
+    today = datetime.fromordinal(today_ordinal)
+    
+    for day_offset in range(1, 4):  # Next 3 days
+        day = today + timedelta(days=day_offset)
+        
+        if day.weekday() < 5:  # Weekday
+            times = [10, 14, 16]  # 10 AM, 2 PM, 4 PM
+        else:  # Weekend
+            times = [11, 14]  # 11 AM, 2 PM
+        
+        for hour in times:
+            slot_time = day.replace(hour=hour, minute=0, second=0, microsecond=0)
+            slots.append({
+                'datetime': slot_time,
+                'formatted': slot_time.strftime('%A, %B %d at %I:%M %p')
+            })
+    
+    return tuple(slots)
+
+
+@lru_cache(maxsize=4)
+def _default_availability_text(today_ordinal: int) -> str:
+    """Default availability text for the two days after the given date"""
+    today = datetime.fromordinal(today_ordinal)
+    tomorrow = today + timedelta(days=1)
+    day_after = today + timedelta(days=2)
+    
+    return f"""📅 {tomorrow.strftime('%A, %B %d')}:
+• 10:00 AM
+• 2:00 PM
+• 4:00 PM
+
+📅 {day_after.strftime('%A, %B %d')}:
+• 10:00 AM
+• 1:00 PM
+• 3:00 PM"""
+
+
+@lru_cache(maxsize=4)
+def _default_availability(today_ordinal: int) -> str:
+    """Default 15-minute slot ranges for the three days after the given date"""
+    today = datetime.fromordinal(today_ordinal)
+    slots = []
+    
+    for i in range(1, 4):  # Next 3 days
+        date = today + timedelta(days=i)
+        day_name = date.strftime('%A, %B %d')
+        
+        if date.weekday() < 5:  # Weekday
+            slots.append(f"📅 {day_name}:\n• 10:00 AM - 10:15 AM\n• 2:00 PM - 2:15 PM\n• 4:00 PM - 4:15 PM")
+        else:  # Weekend
+            slots.append(f"📅 {day_name}:\n• 11:00 AM - 11:15 AM\n• 2:00 PM - 2:15 PM")
+    
+    return "\n\n".join(slots)
+
+
 class BookingAgent(BaseRealEstateAgent):
     """
     Booking Agent responsible for:
@@ -32,6 +248,122 @@ class BookingAgent(BaseRealEstateAgent):
     - Calendar availability checking
     """
     
+    # Booking intent keywords, matched on word boundaries in one pass each
+    _RE_BOOK = re.compile(r'\b(?:yes|sure|ok(?:ay)?|schedule|book(?:ing)?)\b', re.I)
+    _RE_DECLINE = re.compile(r'\b(?:no|not interested|not now)\b', re.I)
+    _RE_WHEN = re.compile(r'\b(?:when|time|available|schedule)\b', re.I)
+    
+    # Meeting types by property type
+    MEETING_TYPES = {
+        "fix_flip": "Property Consultation - Fix & Flip",
+        "vacant_land": "Land Consultation - 15 Minutes",
+        "long_term_rental": "Rental Property Consultation"
+    }
+    
+    # Static parts of the calendar event per property type, built once
+    _EVENT_SKELETONS = {
+        property_type: {
+            "summary_prefix": f"{meeting_type} - ",
+            "property_line": f"Property Type: {property_type.replace('_', ' ').title()}"
+        }
+        for property_type, meeting_type in MEETING_TYPES.items()
+    }
+    
+    # Booking message bodies by property type; only the lead, address and times vary
+    _TMPL_VACANT_LAND = """Perfect, {lead_name}! I'd love to learn more about your land near {property_address}.
+
+The next step is simple: let's schedule a quick 15-minute consultation where I can:
+• Review your land details
+• Provide a cash offer range
+• Answer any questions you have
+
+Here are some available times:
+{available_times}
+
+Just reply with your preferred time and I'll send you a Google Meet link!
+
+Or if none of these work, let me know what day/time is better for you."""
+    
+    _TMPL_FIX_FLIP = """Excellent, {lead_name}! Based on what you've shared about {property_address}, I'd like to schedule a quick call to:
+• Review the property details
+• Provide a fair cash offer range  
+• Explain our simple process
+
+It's just 15 minutes and completely no-obligation.
+
+Here are some available times:
+{available_times}
+
+Just reply with your preferred time and I'll send you a Google Meet link!
+
+Or let me know what works better - afternoon or evening this week?"""
+    
+    _TMPL_RENTAL = """Great, {lead_name}! I'd love to discuss your rental property at {property_address}.
+
+Let's schedule a quick 15-minute call where I can:
+• Review your rental situation
+• Explain how we work with existing leases
+• Provide a cash offer range
+
+Here are some available times:
+{available_times}
+
+Just reply with your preferred time and I'll send you a Google Meet link!
+
+Or tell me your preference - morning, afternoon, or evening?"""
+    
+    _TEMPLATES = {
+        "vacant_land": _TMPL_VACANT_LAND,
+        "fix_flip": _TMPL_FIX_FLIP,
+        "long_term_rental": _TMPL_RENTAL
+    }
+    
+    # Booking confirmation email
+    _CONFIRM_SUBJECT = "Your consultation is confirmed"
+    _RESCHEDULE_SUBJECT = "Let's find another time for our consultation"
+    _CONFIRM_FALLBACK_LINE = "You'll find the Google Meet link in your calendar invitation."
+    _CONFIRM_BODY_TMPL = """Hi {lead_name},
+
+Our 15-minute consultation is confirmed for {formatted_time}.
+
+{meet_line}
+
+If you need to reschedule, just reply to this email.
+
+Talk soon,
+{agent_name}"""
+    
+    # Time selection replies
+    _CONFIRM_TMPL = """Perfect, {lead_name}! I've scheduled our 15-minute consultation for {formatted_time}.
+
+Here's your Google Meet link:
+{meet_link}
+
+I'll also send you a calendar invitation with all the details.
+
+Looking forward to discussing your property and providing you with a cash offer range!
+
+If you need to reschedule, just let me know."""
+    
+    _PENDING_CONFIRM_TMPL = """Perfect, {lead_name}! I've scheduled our 15-minute consultation for {formatted_time}.
+
+I'll send your Google Meet link along with a calendar invitation shortly.
+
+Looking forward to discussing your property and providing you with a cash offer range!
+
+If you need to reschedule, just let me know."""
+    
+    # Pending booking outcomes, sent once the background calendar insert resolves
+    _MEET_LINK_SMS_TMPL = """Here's the Google Meet link for our consultation on {formatted_time}:
+{meet_link}"""
+    
+    _PENDING_FAILED_TMPL = """Hi {lead_name}, I'm sorry - I wasn't able to lock in {formatted_time} on the calendar after all.
+
+Could you send me another day and time that works for you? For example: 'Tuesday at 2 PM' or 'Wednesday at 10 AM'."""
+    
+    _ERROR_TMPL = "I apologize, but I'm having trouble scheduling that time. Let me suggest some alternative times that I know are available. What works better for you?"
+    _CLARIFY_TMPL = "I want to make sure I get the right time for you. Could you let me know which specific day and time works best? For example: 'Tuesday at 2 PM' or 'Wednesday at 10 AM'?"
+    
     def __init__(self):
         super().__init__("booking_agent")
         
@@ -46,14 +378,11 @@ class BookingAgent(BaseRealEstateAgent):
         
         # Default meeting configuration
         self.default_meeting_duration = 15  # minutes
+        self._meeting_duration = timedelta(minutes=self.default_meeting_duration)
         self.meeting_buffer = 30  # minutes between meetings
         
         # Meeting types by property type
-        self.meeting_types = {
-            "fix_flip": "Property Consultation - Fix & Flip",
-            "vacant_land": "Land Consultation - 15 Minutes",
-            "long_term_rental": "Rental Property Consultation"
-        }
+        self.meeting_types = self.MEETING_TYPES
     
     def _initialize_google_services(self):
         """
@@ -62,24 +391,10 @@ class BookingAgent(BaseRealEstateAgent):
         try:
             # Try to initialize Google Calendar service
             if self.google_calendar_credentials or self.google_service_account_key:
-                from google.oauth2.service_account import Credentials
-                from googleapiclient.discovery import build
-                
-                if self.google_service_account_key:
-                    # Use service account key
-                    credentials_info = json.loads(self.google_service_account_key)
-                    credentials = Credentials.from_service_account_info(
-                        credentials_info,
-                        scopes=['https://www.googleapis.com/auth/calendar']
-                    )
-                else:
-                    # Use credentials file
-                    credentials = Credentials.from_service_account_file(
-                        self.google_calendar_credentials,
-                        scopes=['https://www.googleapis.com/auth/calendar']
-                    )
-                
-                self.calendar_service = build('calendar', 'v3', credentials=credentials)
+                self.calendar_service = _build_calendar_service(
+                    self.google_service_account_key,
+                    self.google_calendar_credentials
+                )
                 self.google_available = True
                 self.logger.info("Google Calendar service initialized successfully")
                 
@@ -102,8 +417,7 @@ class BookingAgent(BaseRealEstateAgent):
             
             # Update agent tracking
             state["current_agent"] = "booking_agent"
-            if "booking_agent" not in state["agent_history"]:
-                state["agent_history"].append("booking_agent")
+            record_agent_visit(state, "booking_agent")
             
             # Handle different booking scenarios
             if user_message:
@@ -147,11 +461,11 @@ class BookingAgent(BaseRealEstateAgent):
         
         intent = analysis.get("intent", "unknown")
         
-        if intent == "ready_to_book" or any(word in user_message.lower() for word in ["yes", "sure", "ok", "schedule", "book"]):
+        if intent == "ready_to_book" or self._RE_BOOK.search(user_message):
             return self._provide_booking_options(state)
-        elif intent == "not_interested" or any(word in user_message.lower() for word in ["no", "not interested", "not now"]):
+        elif intent == "not_interested" or self._RE_DECLINE.search(user_message):
             return self._handle_booking_declined(state)
-        elif any(word in user_message.lower() for word in ["when", "time", "available", "schedule"]):
+        elif self._RE_WHEN.search(user_message):
             return self._provide_availability(state)
         else:
             return self._clarify_booking_preference(state, user_message)
@@ -160,62 +474,13 @@ class BookingAgent(BaseRealEstateAgent):
         """
         Generate booking message with Google Meet scheduling
         """
-        lead_name = state["lead_name"]
-        property_type = state["property_type"]
-        property_address = state["property_address"]
-        
-        # Get property-specific meeting type
-        meeting_type = self.meeting_types.get(property_type, "Property Consultation")
+        template = self._TEMPLATES.get(state["property_type"], self._TMPL_RENTAL)
         
-        # Generate available time slots
-        available_times = self._get_available_time_slots()
-        
-        if property_type == "vacant_land":
-            message = f"""Perfect, {lead_name}! I'd love to learn more about your land near {property_address}.
-
-The next step is simple: let's schedule a quick 15-minute consultation where I can:
-• Review your land details
-• Provide a cash offer range
-• Answer any questions you have
-
-Here are some available times:
-{available_times}
-
-Just reply with your preferred time and I'll send you a Google Meet link!
-
-Or if none of these work, let me know what day/time is better for you."""
-        
-        elif property_type == "fix_flip":
-            message = f"""Excellent, {lead_name}! Based on what you've shared about {property_address}, I'd like to schedule a quick call to:
-• Review the property details
-• Provide a fair cash offer range  
-• Explain our simple process
-
-It's just 15 minutes and completely no-obligation.
-
-Here are some available times:
-{available_times}
-
-Just reply with your preferred time and I'll send you a Google Meet link!
-
-Or let me know what works better - afternoon or evening this week?"""
-        
-        else:  # long_term_rental
-            message = f"""Great, {lead_name}! I'd love to discuss your rental property at {property_address}.
-
-Let's schedule a quick 15-minute call where I can:
-• Review your rental situation
-• Explain how we work with existing leases
-• Provide a cash offer range
-
-Here are some available times:
-{available_times}
-
-Just reply with your preferred time and I'll send you a Google Meet link!
-
-Or tell me your preference - morning, afternoon, or evening?"""
-        
-        return message
+        return template.format(
+            lead_name=state["lead_name"],
+            property_address=state["property_address"],
+            available_times=self._get_available_time_slots()
+        )
     
     def _provide_booking_options(self, state: RealEstateAgentState) -> Dict[str, Any]:
         """
@@ -309,68 +574,89 @@ Just let me know what works best!"""
             "state_updates": {"next_action": "send_message"}
         }
     
+    def _build_meet_event(self, state: RealEstateAgentState, meeting_datetime: datetime) -> Dict[str, Any]:
+        """
+        Build the Calendar event body (with a Meet conference request) for a booking
+        """
+        lead_name = state["lead_name"]
+        lead_email = state.get("lead_email")
+        skeleton = self._EVENT_SKELETONS[state["property_type"]]
+        
+        event = {
+            'summary': skeleton["summary_prefix"] + lead_name,
+            'description': f'Property consultation for {state["property_address"]}\n\n{skeleton["property_line"]}\nLead: {lead_name}',
+            'start': {
+                'dateTime': meeting_datetime.isoformat(),
+                'timeZone': 'America/New_York',  # TODO: Get from lead timezone
+            },
+            'end': {
+                'dateTime': (meeting_datetime + self._meeting_duration).isoformat(),
+                'timeZone': 'America/New_York',
+            },
+            'conferenceData': {
+                'createRequest': {
+                    'requestId': f"meet_{state['lead_id']}_{int(meeting_datetime.timestamp())}",
+                    'conferenceSolutionKey': {
+                        'type': 'hangoutsMeet'
+                    }
+                }
+            },
+            'attendees': []
+        }
+        
+        # Add lead email if available
+        if lead_email:
+            event['attendees'].append({'email': lead_email})
+        
+        return event
+    
+    def _meet_event_result(self, created_event: Dict[str, Any], meeting_datetime: datetime) -> Dict[str, Any]:
+        """
+        Extract the Google Meet link and event details from an inserted event
+        """
+        meet_link = None
+        if 'conferenceData' in created_event and 'entryPoints' in created_event['conferenceData']:
+            for entry_point in created_event['conferenceData']['entryPoints']:
+                if entry_point['entryPointType'] == 'video':
+                    meet_link = entry_point['uri']
+                    break
+        
+        return {
+            "success": True,
+            "event_id": created_event['id'],
+            "meet_link": meet_link,
+            "event_link": created_event.get('htmlLink'),
+            "start_time": meeting_datetime.isoformat()
+        }
+    
     def create_google_meet_event(self, state: RealEstateAgentState, meeting_datetime: datetime) -> Dict[str, Any]:
         """
         Create Google Calendar event with Google Meet link
         """
+        if not self.google_available:
+            return {"success": False, "error": "Google Calendar not available"}
+        
         try:
-            if not self.google_available:
-                return {"success": False, "error": "Google Calendar not available"}
-            
-            lead_name = state["lead_name"]
-            property_address = state["property_address"]
-            property_type = state["property_type"]
-            lead_email = state.get("lead_email")
-            
-            # Create event
-            event = {
-                'summary': f'{self.meeting_types[property_type]} - {lead_name}',
-                'description': f'Property consultation for {property_address}\n\nProperty Type: {property_type.replace("_", " ").title()}\nLead: {lead_name}',
-                'start': {
-                    'dateTime': meeting_datetime.isoformat(),
-                    'timeZone': 'America/New_York',  # TODO: Get from lead timezone
-                },
-                'end': {
-                    'dateTime': (meeting_datetime + timedelta(minutes=self.default_meeting_duration)).isoformat(),
-                    'timeZone': 'America/New_York',
-                },
-                'conferenceData': {
-                    'createRequest': {
-                        'requestId': f"meet_{state['lead_id']}_{int(meeting_datetime.timestamp())}",
-                        'conferenceSolutionKey': {
-                            'type': 'hangoutsMeet'
-                        }
-                    }
-                },
-                'attendees': []
-            }
-            
-            # Add lead email if available
-            if lead_email:
-                event['attendees'].append({'email': lead_email})
-            
-            # Create the event
-            created_event = self.calendar_service.events().insert(
+            event = self._build_meet_event(state, meeting_datetime)
+        except Exception as e:
+            self.logger.error(f"Failed to create Google Meet event: {e}")
+            return {"success": False, "error": str(e)}
+        
+        return self._insert_meet_event(self.calendar_service, event, meeting_datetime)
+    
+    def _insert_meet_event(self, calendar_service, event: Dict[str, Any], meeting_datetime: datetime) -> Dict[str, Any]:
+        """
+        Insert a prepared event through the given Calendar client
+        """
+        try:
+            created_event = calendar_service.events().insert(
                 calendarId=self.google_calendar_id,
                 body=event,
                 conferenceDataVersion=1
             ).execute()
+            self._invalidate_busy_times()
             
-            # Extract Google Meet link
-            meet_link = None
-            if 'conferenceData' in created_event and 'entryPoints' in created_event['conferenceData']:
-                for entry_point in created_event['conferenceData']['entryPoints']:
-                    if entry_point['entryPointType'] == 'video':
-                        meet_link = entry_point['uri']
-                        break
-            
-            return {
-                "success": True,
-                "event_id": created_event['id'],
-                "meet_link": meet_link,
-                "event_link": created_event.get('htmlLink'),
-                "start_time": meeting_datetime.isoformat()
-            }
+            return self._meet_event_result(created_event, meeting_datetime)
             
         except Exception as e:
             self.logger.error(f"Failed to create Google Meet event: {e}")
@@ -384,56 +670,124 @@ Just let me know what works best!"""
             if not self.google_available:
                 return self._get_default_availability_slots()
             
+            now = datetime.now()
+            
             # Get busy times for the next few days
-            time_min = datetime.now().isoformat() + 'Z'
-            time_max = (datetime.now() + timedelta(days=days_ahead)).isoformat() + 'Z'
+            busy_start, busy_end = self._get_busy_times(days_ahead, now)
             
-            freebusy_query = {
-                'timeMin': time_min,
-                'timeMax': time_max,
-                'items': [{'id': self.google_calendar_id}]
-            }
+            # Candidate slots as epoch seconds: hourly from 9 AM to 5 PM local time on each day.
+            # Only the day starts go through datetime; the hourly offsets are integer arithmetic.
+            first_day = now.replace(hour=9, minute=0, second=0, microsecond=0)
+            day_starts = np.array(
+                [(first_day + timedelta(days=day)).timestamp() for day in range(1, days_ahead + 1)],
+                dtype=np.int64
+            )
+            hour_offsets = np.arange(17 - 9, dtype=np.int64) * 3600  # 9 AM .. 4 PM starts
+            slot_starts = (day_starts[:, None] + hour_offsets[None, :]).ravel()
+            slot_ends = slot_starts + self.default_meeting_duration * 60
             
-            freebusy_result = self.calendar_service.freebusy().query(body=freebusy_query).execute()
-            busy_times = freebusy_result['calendars'][self.google_calendar_id]['busy']
+            # Compare every slot against every busy period at once, in epoch seconds
+            # (busy periods are UTC, candidate slots are local time)
             
-            # Generate available slots
-            available_slots = []
-            current_time = datetime.now().replace(minute=0, second=0, microsecond=0)
+            conflict = (
+                (slot_starts[:, None] < busy_end[None, :]) & (slot_ends[:, None] > busy_start[None, :])
+            ).any(axis=1)
             
-            for day in range(days_ahead):
-                day_start = (current_time + timedelta(days=day+1)).replace(hour=9)  # 9 AM
-                day_end = day_start.replace(hour=17)  # 5 PM
-                
-                # Check each hour slot
-                slot_time = day_start
-                while slot_time < day_end:
-                    slot_end = slot_time + timedelta(minutes=self.default_meeting_duration)
-                    
-                    # Check if slot conflicts with busy times
-                    is_available = True
-                    for busy_period in busy_times:
-                        busy_start = datetime.fromisoformat(busy_period['start'].replace('Z', '+00:00'))
-                        busy_end = datetime.fromisoformat(busy_period['end'].replace('Z', '+00:00'))
-                        
-                        if (slot_time < busy_end and slot_end > busy_start):
-                            is_available = False
-                            break
-                    
-                    if is_available:
-                        available_slots.append({
-                            'datetime': slot_time,
-                            'formatted': slot_time.strftime('%A, %B %d at %I:%M %p')
-                        })
-                    
-                    slot_time += timedelta(hours=1)
+            # Convert only the kept slots back to datetimes
+            available_slots = []
+            for slot_start in slot_starts[~conflict][:6]:
+                slot_time = datetime.fromtimestamp(int(slot_start))
+                available_slots.append({
+                    'datetime': slot_time,
+                    'formatted': slot_time.strftime('%A, %B %d at %I:%M %p')
+                })
             
-            return available_slots[:6]  # Return first 6 available slots
+            return available_slots  # First 6 available slots
             
         except Exception as e:
             self.logger.error(f"Failed to get calendar availability: {e}")
             return self._get_default_availability_slots()
     
+    def _get_busy_times(self, days_ahead: int, now: Optional[datetime] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Busy period start/end epoch seconds for the calendar, served from a short-lived cache when fresh
+        """
+        cached = _FREEBUSY_CACHE.get(self.google_calendar_id)
+        if (
+            cached is not None
+            and time.monotonic() - cached[0] < FREEBUSY_CACHE_SECONDS
+            and cached[1] >= days_ahead
+        ):
+            return cached[2], cached[3]
+        
+        # Fetch a full week on a miss so later lookups for shorter windows are hits
+        window_days = max(days_ahead, FREEBUSY_PREFETCH_DAYS)
+        now = now or datetime.now()
+        time_min = now.isoformat() + 'Z'
+        time_max = (now + timedelta(days=window_days)).isoformat() + 'Z'
+        
+        freebusy_query = {
+            'timeMin': time_min,
+            'timeMax': time_max,
+            'items': [{'id': self.google_calendar_id}]
+        }
+        
+        freebusy_result = self.calendar_service.freebusy().query(body=freebusy_query).execute()
+        busy_times = freebusy_result['calendars'][self.google_calendar_id]['busy']
+        
+        # Parse once per fetch rather than on every availability lookup
+        busy_start, busy_end = _parse_busy_periods(busy_times)
+        _FREEBUSY_CACHE[self.google_calendar_id] = (time.monotonic(), window_days, busy_start, busy_end)
+        return busy_start, busy_end
+    
+    def _invalidate_busy_times(self):
+        """
+        Drop cached busy periods after the calendar changes
+        """
+        invalidate_freebusy_cache(self.google_calendar_id)
+    
+    def start_calendar_watch(self, address: str, token: str) -> Optional[Dict[str, Any]]:
+        """
+        Subscribe to push notifications for calendar changes so cached availability is dropped on change
+        """
+        if not self.google_available:
+            return None
+        
+        try:
+            channel = self.calendar_service.events().watch(
+                calendarId=self.google_calendar_id,
+                body={
+                    'id': uuid.uuid4().hex,
+                    'type': 'web_hook',
+                    'address': address,
+                    'token': token
+                }
+            ).execute()
+        except Exception as e:
+            self.logger.error(f"Failed to start calendar watch: {e}")
+            return None
+        
+        self.logger.info(f"Watching calendar {self.google_calendar_id} (channel {channel['id']})")
+        return {
+            "channel_id": channel['id'],
+            "resource_id": channel['resourceId'],
+            "expiration": channel.get('expiration')
+        }
+    
+    def stop_calendar_watch(self, channel_id: str, resource_id: str):
+        """
+        Stop a push notification channel started by start_calendar_watch
+        """
+        if not self.google_available:
+            return
+        
+        try:
+            self.calendar_service.channels().stop(
+                body={'id': channel_id, 'resourceId': resource_id}
+            ).execute()
+        except Exception as e:
+            self.logger.error(f"Failed to stop calendar watch: {e}")
+    
     def _get_available_time_slots(self) -> str:
         """
         Get available time slots for the next few days
@@ -466,57 +820,25 @@ Just let me know what works best!"""
         """
         Get default availability slots when Google Calendar is not available
         """
-        slots = []
-        today = datetime.now()
-        
-        for day_offset in range(1, 4):  # Next 3 days
-            day = today + timedelta(days=day_offset)
-            
-            if day.weekday() < 5:  # Weekday
-                times = [10, 14, 16]  # 10 AM, 2 PM, 4 PM
-            else:  # Weekend
-                times = [11, 14]  # 11 AM, 2 PM
-            
-            for hour in times:
-                slot_time = day.replace(hour=hour, minute=0, second=0, microsecond=0)
-                slots.append({
-                    'datetime': slot_time,
-                    'formatted': slot_time.strftime('%A, %B %d at %I:%M %p')
-                })
-        
-        return slots
+        return list(_default_availability_slots(datetime.now().toordinal()))
     
     def _get_default_availability_text(self) -> str:
         """
         Get default availability text when Google Calendar is not available
         """
-        today = datetime.now()
-        tomorrow = today + timedelta(days=1)
-        day_after = today + timedelta(days=2)
-        
-        return f"""📅 {tomorrow.strftime('%A, %B %d')}:
-• 10:00 AM
-• 2:00 PM
-• 4:00 PM
-
-📅 {day_after.strftime('%A, %B %d')}:
-• 10:00 AM
-• 1:00 PM
-• 3:00 PM"""
+        return _default_availability_text(datetime.now().toordinal())
     
     def _fetch_calendly_availability(self) -> str:
         """
         Fetch real availability from Calendly API
         """
         try:
-            headers = {
-                "Authorization": f"Bearer {self.calendly_token}",
-                "Content-Type": "application/json"
-            }
+            headers = {"Authorization": f"Bearer {self.calendly_token}"}
             
             # Get availability for next 3 days
-            start_time = datetime.now().isoformat()
-            end_time = (datetime.now() + timedelta(days=3)).isoformat()
+            now = datetime.now()
+            start_time = now.isoformat()
+            end_time = (now + timedelta(days=3)).isoformat()
             
             url = f"https://api.calendly.com/user_availability_schedules"
             params = {
@@ -525,7 +847,7 @@ Just let me know what works best!"""
                 "end_time": end_time
             }
             
-            response = requests.get(url, headers=headers, params=params)
+            response = _get_calendly_http().get(url, headers=headers, params=params, timeout=5)
             
             if response.status_code == 200:
                 data = response.json()
@@ -550,19 +872,7 @@ Just let me know what works best!"""
         """
         Get default availability when Calendly API is not available
         """
-        today = datetime.now()
-        slots = []
-        
-        for i in range(1, 4):  # Next 3 days
-            date = today + timedelta(days=i)
-            day_name = date.strftime('%A, %B %d')
-            
-            if date.weekday() < 5:  # Weekday
-                slots.append(f"📅 {day_name}:\n• 10:00 AM - 10:15 AM\n• 2:00 PM - 2:15 PM\n• 4:00 PM - 4:15 PM")
-            else:  # Weekend
-                slots.append(f"📅 {day_name}:\n• 11:00 AM - 11:15 AM\n• 2:00 PM - 2:15 PM")
-        
-        return "\n\n".join(slots)
+        return _default_availability(datetime.now().toordinal())
     
     def create_meeting_reminder(self, state: RealEstateAgentState, meeting_time: datetime) -> Dict[str, Any]:
         """
@@ -652,33 +962,41 @@ Derek"""
             selected_time = self._parse_time_selection(user_message)
             
             if selected_time:
-                # Create Google Meet event
-                event_result = self.create_google_meet_event(state, selected_time)
+                if not self.google_available:
+                    event_result = {"success": False, "error": "Google Calendar not available"}
+                else:
+                    # Create Google Meet event off the request path, on the worker's own Calendar client
+                    event_future = _BOOKING_EXECUTOR.submit(
+                        _create_meet_event_on_worker,
+                        self,
+                        self._build_meet_event(state, selected_time),
+                        selected_time
+                    )
+                    try:
+                        event_result = event_future.result(timeout=MEET_LINK_WAIT_SECONDS)
+                    except FutureTimeoutError:
+                        return self._confirm_pending_booking(state, selected_time, event_future)
                 
                 if event_result["success"]:
                     lead_name = state["lead_name"]
                     formatted_time = selected_time.strftime('%A, %B %d at %I:%M %p')
                     meet_link = event_result["meet_link"]
                     
-                    confirmation_message = f"""Perfect, {lead_name}! I've scheduled our 15-minute consultation for {formatted_time}.
-
-Here's your Google Meet link:
-{meet_link}
-
-I'll also send you a calendar invitation with all the details.
-
-Looking forward to discussing your property and providing you with a cash offer range!
-
-If you need to reschedule, just let me know."""
+                    confirmation_message = self._CONFIRM_TMPL.format_map({
+                        "lead_name": lead_name,
+                        "formatted_time": formatted_time,
+                        "meet_link": meet_link
+                    })
                     
                     # Update state with booking details
-                    state["booking_details"] = {
+                    booking_details = state["booking_details"] = {
                         "scheduled_time": selected_time.isoformat(),
                         "meet_link": meet_link,
                         "event_id": event_result["event_id"],
                         "status": "scheduled"
                     }
                     
+                    self._persist_booking(state["lead_id"], booking_details)
                     advance_conversation_stage(state, "scheduled")
                     
                     return {
@@ -687,28 +1005,24 @@ If you need to reschedule, just let me know."""
                         "message": confirmation_message,
                         "state_updates": {
                             "conversation_stage": "scheduled",
-                            "booking_details": state["booking_details"],
+                            "booking_details": booking_details,
                             "next_action": "send_message"
                         }
                     }
                 else:
                     # Failed to create event
-                    error_message = f"I apologize, but I'm having trouble scheduling that time. Let me suggest some alternative times that I know are available. What works better for you?"
-                    
                     return {
                         "next_agent": "communication_router",
                         "action": "send_message",
-                        "message": error_message,
+                        "message": self._ERROR_TMPL,
                         "state_updates": {"next_action": "send_message"}
                     }
             else:
                 # Couldn't parse time selection
-                clarification_message = f"I want to make sure I get the right time for you. Could you let me know which specific day and time works best? For example: 'Tuesday at 2 PM' or 'Wednesday at 10 AM'?"
-                
                 return {
                     "next_agent": "communication_router",
                     "action": "send_message",
-                    "message": clarification_message,
+                    "message": self._CLARIFY_TMPL,
                     "state_updates": {"next_action": "send_message"}
                 }
                 
@@ -716,59 +1030,328 @@ If you need to reschedule, just let me know."""
             self.logger.error(f"Error handling time selection: {e}")
             return self._clarify_booking_preference(state, user_message)
     
+    def _confirm_pending_booking(self, state: RealEstateAgentState, selected_time: datetime, event_future) -> Dict[str, Any]:
+        """
+        Confirm the time while the calendar event is still being created; the Meet link follows by
+        email (or SMS when there is no email) once the insert resolves
+        """
+        lead_name = state["lead_name"]
+        formatted_time = selected_time.strftime('%A, %B %d at %I:%M %p')
+        
+        confirmation_message = self._PENDING_CONFIRM_TMPL.format_map({
+            "lead_name": lead_name,
+            "formatted_time": formatted_time
+        })
+        
+        booking_details = state["booking_details"] = {
+            "scheduled_time": selected_time.isoformat(),
+            "meet_link": None,
+            "event_id": None,
+            "status": "pending"
+        }
+        
+        # Written before the callback is attached: if the insert has already finished the callback
+        # runs immediately, and its outcome must not be overwritten by the pending row
+        self._persist_booking(state["lead_id"], booking_details)
+        
+        # Persist the outcome and send the link (or a reschedule request) once the insert resolves
+        event_future.add_done_callback(partial(
+            self._on_pending_event_created,
+            state,
+            selected_time,
+            formatted_time
+        ))
+        
+        advance_conversation_stage(state, "scheduled")
+        
+        return {
+            "next_agent": "communication_router",
+            "action": "send_message",
+            "message": confirmation_message,
+            "state_updates": {
+                "conversation_stage": "scheduled",
+                "booking_details": booking_details,
+                "next_action": "send_message"
+            }
+        }
+    
+    def _on_pending_event_created(
+        self, 
+        state: RealEstateAgentState, 
+        selected_time: datetime, 
+        formatted_time: str, 
+        event_future
+    ):
+        """
+        Persist the outcome of a pending booking and tell the lead
+        
+        Runs after the graph step has returned, so nothing here can go through state_updates:
+        the booking is written to the lead row and the lead is messaged directly.
+        """
+        try:
+            event_result = event_future.result()
+        except Exception as e:
+            event_result = {"success": False, "error": str(e)}
+        
+        if not event_result["success"]:
+            self.logger.error(f"Pending booking for lead {state['lead_id']} failed: {event_result['error']}")
+            booking_details = {
+                "scheduled_time": selected_time.isoformat(),
+                "meet_link": None,
+                "event_id": None,
+                "status": "failed"
+            }
+            self._persist_booking(state["lead_id"], booking_details)
+            message = self._PENDING_FAILED_TMPL.format_map({
+                "lead_name": state["lead_name"],
+                "formatted_time": formatted_time
+            })
+            if state.get("lead_phone"):
+                self._notify_lead_by_sms(state["lead_id"], state["lead_phone"], message, booking_details)
+            elif state.get("lead_email"):
+                _BOOKING_EXECUTOR.submit(self._send_reschedule_email, state, state["lead_email"], message)
+            return
+        
+        meet_link = event_result["meet_link"]
+        booking_details = {
+            "scheduled_time": selected_time.isoformat(),
+            "meet_link": meet_link,
+            "event_id": event_result["event_id"],
+            "status": "scheduled"
+        }
+        self._persist_booking(state["lead_id"], booking_details)
+        
+        lead_email = state.get("lead_email")
+        if lead_email:
+            _BOOKING_EXECUTOR.submit(
+                self._send_confirmation_email,
+                state,
+                lead_email,
+                formatted_time,
+                meet_link
+            )
+        elif meet_link and state.get("lead_phone"):
+            self._notify_lead_by_sms(state["lead_id"], state["lead_phone"], self._MEET_LINK_SMS_TMPL.format_map({
+                "formatted_time": formatted_time,
+                "meet_link": meet_link
+            }), booking_details)
+    
+    def _persist_booking(self, lead_id: str, booking_details: Dict[str, Any]):
+        """
+        Store the booking under qualification_data["booking"] on the lead row; a scheduled booking
+        also moves the lead to appointment_set with the call as its next follow-up
+        """
+        scheduled = booking_details["status"] == "scheduled"
+        
+        with get_db_pool().write() as conn:
+            try:
+                with conn:
+                    conn.execute("""
+                        UPDATE leads
+                        SET qualification_data = json_set(COALESCE(qualification_data, '{}'), '$.booking', json(?)),
+                            status = CASE WHEN ? THEN 'appointment_set' ELSE status END,
+                            next_follow_up_date = CASE WHEN ? THEN ? ELSE next_follow_up_date END,
+                            updated_at = ?
+                        WHERE id = ?
+                    """, (
+                        json.dumps(booking_details),
+                        scheduled,
+                        scheduled,
+                        booking_details["scheduled_time"],
+                        datetime.now().isoformat(),
+                        lead_id
+                    ))
+            except Exception as e:
+                self.logger.error(f"Failed to persist booking for lead {lead_id}: {e}")
+    
+    def _get_sms_service(self):
+        """
+        Get the shared Telnyx SMS service, or None when SMS isn't configured
+        """
+        global _sms_service
+        
+        if _sms_service is None:
+            with _sms_service_lock:
+                if _sms_service is None:
+                    try:
+                        from services.telnyx_service import TelnyxSMSService
+                        _sms_service = TelnyxSMSService()
+                    except Exception as e:
+                        self.logger.warning(f"SMS service not available: {e}")
+                        _sms_service = False
+        
+        return _sms_service or None
+    
+    def _notify_lead_by_sms(
+        self, 
+        lead_id: str, 
+        phone_number: str, 
+        message: str, 
+        booking_details: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Text the lead outside the graph once contact is compliant
+        
+        The graph state for this booking has already been returned, so the send is recorded
+        under booking["notification"] on the lead row instead. Opted-out leads are never texted;
+        a send during quiet hours is deferred and retried every SMS_DEFER_SECONDS.
+        """
+        sms_service = self._get_sms_service()
+        if sms_service is None:
+            self.logger.error(f"SMS not available - could not notify lead {lead_id}")
+            return {"success": False, "error": "SMS not available"}
+        
+        from services.telnyx_service import format_phone_number
+        formatted_phone = format_phone_number(phone_number)
+        
+        compliance = ComplianceChecker().is_compliant_to_contact(phone_number=formatted_phone)
+        if compliance["opt_out_status"]:
+            self._persist_notification(lead_id, booking_details, message, "opted_out", error="Lead has opted out")
+            return {"success": False, "error": "Lead has opted out"}
+        
+        if not compliance["overall_compliant"]:
+            self.logger.info(f"Deferring booking text to lead {lead_id} until contact hours")
+            self._persist_notification(lead_id, booking_details, message, "deferred", error="Outside contact hours")
+            retry = threading.Timer(
+                SMS_DEFER_SECONDS,
+                _BOOKING_EXECUTOR.submit,
+                args=(self._notify_lead_by_sms, lead_id, phone_number, message, booking_details)
+            )
+            retry.daemon = True
+            retry.start()
+            return {"success": False, "error": "Outside contact hours", "deferred": True}
+        
+        result = sms_service.send_sms(to_number=formatted_phone, message=message)
+        if result["success"]:
+            self._persist_notification(lead_id, booking_details, message, "sent", message_id=result.get("message_id"))
+        else:
+            self.logger.error(f"Failed to notify lead {lead_id}: {result.get('error')}")
+            self._persist_notification(lead_id, booking_details, message, "failed", error=result.get("error"))
+        return result
+    
+    def _persist_notification(
+        self, 
+        lead_id: str, 
+        booking_details: Dict[str, Any], 
+        message: str, 
+        status: str, 
+        message_id: Optional[str] = None, 
+        error: Optional[str] = None
+    ):
+        """
+        Record the latest booking text attempt alongside the booking it belongs to
+        """
+        self._persist_booking(lead_id, {
+            **booking_details,
+            "notification": {
+                "method": "sms",
+                "message": message,
+                "status": status,
+                "message_id": message_id,
+                "error": error,
+                "at": datetime.now().isoformat()
+            }
+        })
+    
+    def _get_email_agent(self):
+        """
+        Get the shared EmailAgent, creating it on first use
+        """
+        global _email_agent
+        
+        if _email_agent is None:
+            with _email_agent_lock:
+                if _email_agent is None:
+                    from agents.email_agent import EmailAgent
+                    _email_agent = EmailAgent()
+        
+        return _email_agent
+    
+    def _send_confirmation_email(
+        self, 
+        state: RealEstateAgentState, 
+        to_email: str, 
+        formatted_time: str, 
+        meet_link: Optional[str]
+    ) -> Dict[str, Any]:
+        """
+        Email the booking confirmation with the Google Meet link
+        """
+        email_agent = self._get_email_agent()
+        
+        if not email_agent.email_available:
+            return {"success": False, "error": "Email not available"}
+        
+        body = self._CONFIRM_BODY_TMPL.format(
+            lead_name=state['lead_name'],
+            formatted_time=formatted_time,
+            meet_line=f"Google Meet link: {meet_link}" if meet_link else self._CONFIRM_FALLBACK_LINE,
+            agent_name=state.get("agent_name", "Derek")
+        )
+        
+        return email_agent._send_email(to_email, self._CONFIRM_SUBJECT, body, state)
+    
+    def _send_reschedule_email(self, state: RealEstateAgentState, to_email: str, message: str) -> Dict[str, Any]:
+        """
+        Email the lead that a pending booking fell through
+        """
+        email_agent = self._get_email_agent()
+        
+        if not email_agent.email_available:
+            return {"success": False, "error": "Email not available"}
+        
+        return email_agent._send_email(to_email, self._RESCHEDULE_SUBJECT, message, state)
+    
     def _parse_time_selection(self, user_message: str) -> Optional[datetime]:
         """
         Parse user's time selection from natural language
-        """
-        import re
         
+        The message is lowercased once and matched with case-sensitive patterns, which is faster
+        on short replies than re.IGNORECASE folding every character inside the matcher
+        """
         try:
+            # Fast path: the whole reply is an explicit date and time
+            text = user_message.strip()
+            if text[:1].isdigit():
+                for fmt in _FAST_FORMATS:
+                    try:
+                        return datetime.strptime(text, fmt)
+                    except ValueError:
+                        continue
+            
             # Simple parsing for common time formats
             message_lower = user_message.lower()
             
-            # Look for day and time patterns
-            day_patterns = {
-                'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3, 
-                'friday': 4, 'saturday': 5, 'sunday': 6,
-                'tomorrow': 1, 'today': 0
-            }
-            
-            # Find day
+            # Find day - when several day words appear, the earliest in _DAY_OFFSET wins
             target_day = None
-            for day_name, day_offset in day_patterns.items():
-                if day_name in message_lower:
-                    if day_name in ['tomorrow', 'today']:
-                        target_day = datetime.now() + timedelta(days=day_offset)
-                    else:
-                        # Find next occurrence of this weekday
-                        today = datetime.now()
-                        days_ahead = (day_offset - today.weekday()) % 7
-                        if days_ahead == 0:
-                            days_ahead = 7  # Next week
-                        target_day = today + timedelta(days=days_ahead)
-                    break
+            today = datetime.now()
+            day_matches = _DAY_RE.findall(message_lower)
+            if day_matches:
+                day_name = min(day_matches, key=_DAY_PRIORITY.__getitem__)
+                day_offset = _DAY_OFFSET[day_name]
+                if day_name in ('tomorrow', 'today'):
+                    target_day = today + timedelta(days=day_offset)
+                else:
+                    # Find next occurrence of this weekday
+                    days_ahead = (day_offset - today.weekday()) % 7
+                    if days_ahead == 0:
+                        days_ahead = 7  # Next week
+                    target_day = today + timedelta(days=days_ahead)
             
             # Find time
-            time_patterns = [
-                r'(\d{1,2}):?(\d{0,2})\s*(am|pm)',
-                r'(\d{1,2})\s*(am|pm)',
-            ]
-            
             target_time = None
-            for pattern in time_patterns:
-                match = re.search(pattern, message_lower)
-                if match:
-                    hour = int(match.group(1))
-                    minute = int(match.group(2)) if match.group(2) else 0
-                    
-                    if len(match.groups()) >= 3 and match.group(3):
-                        if match.group(3) == 'pm' and hour != 12:
-                            hour += 12
-                        elif match.group(3) == 'am' and hour == 12:
-                            hour = 0
-                    
-                    target_time = (hour, minute)
-                    break
+            match = _TIME_RE.search(message_lower)
+            if match:
+                hour = int(match.group(1))
+                minute = int(match.group(2)) if match.group(2) else 0
+                meridiem = match.group(3)
+                
+                if meridiem == 'pm' and hour != 12:
+                    hour += 12
+                elif meridiem == 'am' and hour == 12:
+                    hour = 0
+                
+                target_time = (hour, minute)
             
             # Combine day and time
             if target_day and target_time:
@@ -828,11 +1411,22 @@ If you need to reschedule, just let me know."""
         """
 
 
+# One BookingAgent per thread rather than per graph step: the agent holds no per-call
+# state, but its Calendar client's httplib2 transport must not be shared across threads
+_thread_agents = threading.local()
+
+def _booking_agent() -> BookingAgent:
+    agent = getattr(_thread_agents, "booking_agent", None)
+    if agent is None:
+        agent = _thread_agents.booking_agent = BookingAgent()
+    return agent
+
+
 def booking_agent_node(state: RealEstateAgentState) -> Dict[str, Any]:
     """
     Node function for booking agent
     """
-    agent = BookingAgent()
+    agent = _booking_agent()
     
     # Get the most recent message if available
     user_message = None
@@ -844,16 +1438,16 @@ def booking_agent_node(state: RealEstateAgentState) -> Dict[str, Any]:
     return agent.process_message(state, user_message)
 
 
+# Booking result routing: next_action first, then conversation_stage, else back to the supervisor
+_BOOKING_ACTION_ROUTES = {"send_message": "communication_router"}
+_BOOKING_STAGE_ROUTES = {"not_interested": "END"}
+
 def route_booking_result(state: RealEstateAgentState) -> str:
     """
     Routing function for booking agent results
     """
-    next_action = state.get("next_action")
-    conversation_stage = state.get("conversation_stage")
-    
-    if next_action == "send_message":
-        return "communication_router"
-    elif conversation_stage == "not_interested":
-        return "END"
-    else:
-        return "supervisor"
+    # next_action takes precedence over the conversation stage
+    return (
+        _BOOKING_ACTION_ROUTES.get(state.get("next_action"))
+        or _BOOKING_STAGE_ROUTES.get(state.get("conversation_stage"), "supervisor")
+    )
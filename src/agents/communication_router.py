@@ -3,23 +3,35 @@ Communication Router Agent
 Handles multi-channel communication priority and routing
 """
 
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
 from typing import Dict, Any, Optional
 from datetime import datetime, timedelta
 
-from langchain_core.messages import HumanMessage, AIMessage
-
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from agents.base_agent import BaseRealEstateAgent, ComplianceChecker
+from agents.base_agent import BaseRealEstateAgent, ComplianceChecker, get_db_pool
 from schemas.agent_state import (
     RealEstateAgentState, 
     update_state_timestamp,
-    add_communication_attempt
+    add_communication_attempt,
+    refresh_communication_counters,
+    record_agent_visit
 )
 
 
+# Business hours for sends: 9 AM through the end of the 6 PM hour (inclusive hour bounds)
+_BH_START, _BH_END = 9, 18
+_ONE_DAY = timedelta(days=1)
+
+
+@dataclass(frozen=True)
+class AttemptStats:
+    """Per-channel send counts and recent-failure flags for one routing decision"""
+    sms_today: int
+    email_today: int
+    sms_recent_fail: bool
+    email_recent_fail: bool
+
+
 class CommunicationRouterAgent(BaseRealEstateAgent):
     """
     Communication Router Agent responsible for:
@@ -31,7 +43,11 @@ class CommunicationRouterAgent(BaseRealEstateAgent):
     
     def __init__(self):
         super().__init__("communication_router")
-        self.compliance_checker = ComplianceChecker()
+    
+    @cached_property
+    def compliance_checker(self) -> ComplianceChecker:
+        """Compliance checker, built on the first routing decision that needs it"""
+        return ComplianceChecker()
     
     def process_message(self, state: RealEstateAgentState, user_message: str = None) -> Dict[str, Any]:
         """
@@ -42,8 +58,12 @@ class CommunicationRouterAgent(BaseRealEstateAgent):
             
             # Update agent tracking
             state["current_agent"] = "communication_router"
-            if "communication_router" not in state["agent_history"]:
-                state["agent_history"].append("communication_router")
+            record_agent_visit(state, "communication_router")
+            
+            # Leads with neither a phone nor an email can't be routed anywhere - skip the channel checks
+            if not state.get("lead_phone") and not state.get("lead_email"):
+                self.log_agent_action(state, "no_channels_available", {"reason": "no_contact_info"})
+                return self._no_channels_result()
             
             # Determine best communication channel
             channel_decision = self._determine_communication_channel(state)
@@ -72,28 +92,41 @@ class CommunicationRouterAgent(BaseRealEstateAgent):
             
             else:
                 # No communication channel available
-                return {
-                    "next_agent": "END",
-                    "action": "no_channels_available",
-                    "state_updates": {
-                        "last_error": "No available communication channels",
-                        "conversation_stage": "failed"
-                    }
-                }
+                return self._no_channels_result()
                 
         except Exception as e:
             self.handle_error(state, e)
             return {"next_agent": "END", "action": "error"}
     
-    def _determine_communication_channel(self, state: RealEstateAgentState) -> Dict[str, Any]:
+    def _no_channels_result(self) -> Dict[str, Any]:
+        """
+        Routing result for a lead that can't be reached on any channel
+        """
+        return {
+            "next_agent": "END",
+            "action": "no_channels_available",
+            "state_updates": {
+                "last_error": "No available communication channels",
+                "last_error_lc": "no available communication channels",
+                "conversation_stage": "failed"
+            }
+        }
+    
+    def _determine_communication_channel(
+        self, 
+        state: RealEstateAgentState, 
+        now: Optional[datetime] = None
+    ) -> Dict[str, Any]:
         """
         Determine the best communication channel based on priority and availability
         
         Priority: SMS > Email
         """
         
+        stats = self._scan_attempts(state, now)
+        
         # Check SMS availability and priority
-        if self._can_use_sms(state):
+        if self._can_use_sms(state, stats):
             return {
                 "channel": "sms",
                 "action": "send_message",
@@ -102,7 +135,7 @@ class CommunicationRouterAgent(BaseRealEstateAgent):
             }
         
         # Check Email availability as fallback
-        elif self._can_use_email(state):
+        elif self._can_use_email(state, stats):
             return {
                 "channel": "email", 
                 "action": "send_message",
@@ -119,7 +152,7 @@ class CommunicationRouterAgent(BaseRealEstateAgent):
                 "priority": 0
             }
     
-    def _can_use_sms(self, state: RealEstateAgentState) -> bool:
+    def _can_use_sms(self, state: RealEstateAgentState, stats: Optional[AttemptStats] = None) -> bool:
         """
         Check if SMS communication is available and compliant
         """
@@ -128,9 +161,12 @@ class CommunicationRouterAgent(BaseRealEstateAgent):
             self.log_agent_action(state, "sms_unavailable", {"reason": "no_phone_number"})
             return False
         
+        if stats is None:
+            stats = self._scan_attempts(state)
+        
         # Check if SMS has failed recently
         if state.get("sms_failed"):
-            if self._sms_failed_recently(state):
+            if stats.sms_recent_fail:
                 self.log_agent_action(state, "sms_unavailable", {"reason": "recent_failure"})
                 return False
         
@@ -143,14 +179,14 @@ class CommunicationRouterAgent(BaseRealEstateAgent):
             self.log_agent_action(state, "sms_unavailable", {"reason": "compliance_failed", "details": compliance_result})
             return False
         
-        # Check daily SMS limits
-        if self._reached_sms_limits(state):
+        # Check daily SMS limits - max 5 SMS per lead per day
+        if stats.sms_today >= 5:
             self.log_agent_action(state, "sms_unavailable", {"reason": "daily_limits_reached"})
             return False
         
         return True
     
-    def _can_use_email(self, state: RealEstateAgentState) -> bool:
+    def _can_use_email(self, state: RealEstateAgentState, stats: Optional[AttemptStats] = None) -> bool:
         """
         Check if Email communication is available
         """
@@ -159,9 +195,12 @@ class CommunicationRouterAgent(BaseRealEstateAgent):
             self.log_agent_action(state, "email_unavailable", {"reason": "no_email_address"})
             return False
         
+        if stats is None:
+            stats = self._scan_attempts(state)
+        
         # Check if email has failed recently
         if state.get("email_failed"):
-            if self._email_failed_recently(state):
+            if stats.email_recent_fail:
                 self.log_agent_action(state, "email_unavailable", {"reason": "recent_failure"})
                 return False
         
@@ -170,87 +209,53 @@ class CommunicationRouterAgent(BaseRealEstateAgent):
             self.log_agent_action(state, "email_unavailable", {"reason": "opted_out"})
             return False
         
-        # Check daily email limits
-        if self._reached_email_limits(state):
+        # Check daily email limits - max 3 emails per lead per day
+        if stats.email_today >= 3:
             self.log_agent_action(state, "email_unavailable", {"reason": "daily_limits_reached"})
             return False
         
         return True
     
-    def _sms_failed_recently(self, state: RealEstateAgentState, hours: int = 24) -> bool:
-        """
-        Check if SMS failed within the last N hours
-        """
-        cutoff_time = datetime.now() - timedelta(hours=hours)
-        
-        for attempt in state["communication_attempts"]:
-            if (attempt["method"] == "sms" and 
-                not attempt["success"] and
-                datetime.fromisoformat(attempt["timestamp"]) > cutoff_time):
-                return True
-        
-        return False
-    
-    def _email_failed_recently(self, state: RealEstateAgentState, hours: int = 6) -> bool:
-        """
-        Check if Email failed within the last N hours
-        """
-        cutoff_time = datetime.now() - timedelta(hours=hours)
-        
-        for attempt in state["communication_attempts"]:
-            if (attempt["method"] == "email" and 
-                not attempt["success"] and
-                datetime.fromisoformat(attempt["timestamp"]) > cutoff_time):
-                return True
-        
-        return False
-    
-    def _reached_sms_limits(self, state: RealEstateAgentState) -> bool:
+    def _scan_attempts(self, state: RealEstateAgentState, now: Optional[datetime] = None) -> AttemptStats:
         """
-        Check if daily SMS limits have been reached
+        Evaluate the recent-failure and daily-limit predicates for both channels in one pass
         """
-        today = datetime.now().date()
-        sms_count_today = 0
-        
-        for attempt in state["communication_attempts"]:
-            if (attempt["method"] == "sms" and 
-                datetime.fromisoformat(attempt["timestamp"]).date() == today):
-                sms_count_today += 1
-        
-        # Max 5 SMS per lead per day
-        return sms_count_today >= 5
-    
-    def _reached_email_limits(self, state: RealEstateAgentState) -> bool:
-        """
-        Check if daily email limits have been reached
-        """
-        today = datetime.now().date()
-        email_count_today = 0
-        
-        for attempt in state["communication_attempts"]:
-            if (attempt["method"] == "email" and 
-                datetime.fromisoformat(attempt["timestamp"]).date() == today):
-                email_count_today += 1
-        
-        # Max 3 emails per lead per day
-        return email_count_today >= 3
+        # One clock read so the day rollover and the failure windows agree
+        now = now or datetime.now()
+        refresh_communication_counters(state, now)
+        now_ts = now.timestamp()
+        
+        last_sms_failure = state["last_sms_failure_ts"]
+        last_email_failure = state["last_email_failure_ts"]
+        
+        return AttemptStats(
+            sms_today=state["sms_count_today"],
+            email_today=state["email_count_today"],
+            # SMS failures block the channel for 24 hours, email failures for 6
+            sms_recent_fail=last_sms_failure is not None and last_sms_failure > now_ts - 24 * 3600,
+            email_recent_fail=last_email_failure is not None and last_email_failure > now_ts - 6 * 3600
+        )
     
-    def get_optimal_send_time(self, state: RealEstateAgentState, channel: str) -> Optional[datetime]:
+    def get_optimal_send_time(
+        self, 
+        state: RealEstateAgentState, 
+        channel: str, 
+        now: Optional[datetime] = None
+    ) -> Optional[datetime]:
         """
         Determine optimal time to send message based on lead behavior
         """
         # For now, return immediate send if within business hours
-        now = datetime.now()
+        now = now or datetime.now()
         hour = now.hour
         
-        # Business hours: 9 AM - 6 PM
-        if 9 <= hour <= 18:
+        if _BH_START <= hour <= _BH_END:
             return now
         
         # Schedule for next business day at 9 AM
-        next_send = now.replace(hour=9, minute=0, second=0, microsecond=0)
-        if hour >= 18:
-            next_send += timedelta(days=1)
+        next_send = now.replace(hour=_BH_START, minute=0, second=0, microsecond=0)
+        if hour > _BH_END:
+            next_send += _ONE_DAY
         
         return next_send
     
@@ -285,27 +290,28 @@ class CommunicationRouterAgent(BaseRealEstateAgent):
         """
 
 
+@lru_cache(maxsize=1)
+def _communication_router_agent() -> CommunicationRouterAgent:
+    """Build the router once per process; all per-conversation data lives in the state"""
+    return CommunicationRouterAgent()
+
+
 def communication_router_node(state: RealEstateAgentState) -> Dict[str, Any]:
     """
     Node function for communication router in LangGraph
     """
-    agent = CommunicationRouterAgent()
-    return agent.process_message(state)
+    return _communication_router_agent().process_message(state)
+
 
+# preferred_channel -> next node
+_CHANNEL_ROUTES = {"sms": "sms_agent", "email": "email_agent"}
 
 def route_communication_channel(state: RealEstateAgentState) -> str:
     """
     Routing function for communication channel decisions
     """
-    preferred_channel = state.get("preferred_channel")
-    
-    if preferred_channel == "sms":
-        return "sms_agent"
-    elif preferred_channel == "email":
-        return "email_agent"
-    else:
-        # Default to END if no channel available
-        return "END"
+    # Default to END if no channel available
+    return _CHANNEL_ROUTES.get(state.get("preferred_channel"), "END")
 
 
 # Utility functions for communication management
@@ -313,43 +319,38 @@ def get_communication_stats(lead_id: str) -> Dict[str, Any]:
     """
     Get communication statistics for a lead
     """
-    import sqlite3
+    result = {
+        method: {"total": 0, "ai_generated": 0, "last_message": None}
+        for method in ("sms", "email")
+    }
     
-    conn = sqlite3.connect("agent_estate.db")
     try:
-        # Get message counts by method
-        stats = conn.execute("""
-            SELECT 
-                method,
-                COUNT(*) as total_messages,
-                SUM(CASE WHEN ai_generated = 1 THEN 1 ELSE 0 END) as ai_messages,
-                MAX(timestamp) as last_message
-            FROM messages m
-            JOIN conversations c ON m.conversation_id = c.id
-            WHERE c.lead_id = ?
-            GROUP BY method
-        """, (lead_id,)).fetchall()
-        
-        result = {
-            "sms": {"total": 0, "ai_generated": 0, "last_message": None},
-            "email": {"total": 0, "ai_generated": 0, "last_message": None}
-        }
-        
-        for stat in stats:
-            method = stat["method"]
-            if method in result:
-                result[method] = {
-                    "total": stat["total_messages"],
-                    "ai_generated": stat["ai_messages"],
-                    "last_message": stat["last_message"]
-                }
+        # Get message counts by method, unpacking rows straight off the cursor
+        with get_db_pool().read() as conn:
+            stats = conn.execute("""
+                SELECT 
+                    method,
+                    COUNT(*) as total_messages,
+                    SUM(CASE WHEN ai_generated = 1 THEN 1 ELSE 0 END) as ai_messages,
+                    MAX(timestamp) as last_message
+                FROM messages m
+                JOIN conversations c ON m.conversation_id = c.id
+                WHERE c.lead_id = ?
+                GROUP BY method
+            """, (lead_id,))
+            
+            for method, total_messages, ai_messages, last_message in stats:
+                if method in result:
+                    result[method] = {
+                        "total": total_messages,
+                        "ai_generated": ai_messages,
+                        "last_message": last_message
+                    }
         
         return result
         
     except Exception as e:
         return {"error": str(e)}
-    finally:
-        conn.close()
 
 
 def update_channel_failure(state: RealEstateAgentState, channel: str, error: str):
@@ -361,7 +362,9 @@ def update_channel_failure(state: RealEstateAgentState, channel: str, error: str
     elif channel == "email":
         state["email_failed"] = True
     
-    state["last_error"] = f"{channel} failure: {error}"
+    error_message = f"{channel} failure: {error}"
+    state["last_error"] = error_message
+    state["last_error_lc"] = error_message.lower()
     state["retry_count"] += 1
     
     return update_state_timestamp(state)
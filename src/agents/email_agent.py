@@ -4,24 +4,56 @@ Handles email communication with threading and reply monitoring
 """
 
 import os
+import re
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from typing import Dict, Any, Optional, List
 from datetime import datetime
+from functools import lru_cache
 import smtplib
+import threading
+from cachetools import TTLCache
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.utils import make_msgid
 
-from agents.base_agent import BaseRealEstateAgent, ComplianceChecker
+from agents.base_agent import BaseRealEstateAgent, ComplianceChecker, get_db_pool
 from schemas.agent_state import (
     RealEstateAgentState, 
     update_state_timestamp,
-    add_communication_attempt
+    add_communication_attempt,
+    record_agent_visit
 )
 
 
+# One authenticated Gmail SMTP session per process, reused across sends instead of paying a
+# TCP + STARTTLS + AUTH handshake per email. smtplib sessions aren't thread-safe, so sends
+# are serialized on the lock; a session Gmail has dropped is reopened once per send.
+SMTP_HOST = "smtp.gmail.com"
+SMTP_PORT = 587
+SMTP_TIMEOUT_SECONDS = 30
+_smtp: Optional[smtplib.SMTP] = None
+_smtp_lock = threading.Lock()
+
+def close_smtp_connection():
+    """Close the shared SMTP session (call on application shutdown)"""
+    global _smtp
+    
+    with _smtp_lock:
+        if _smtp is not None:
+            try:
+                _smtp.quit()
+            except Exception:
+                pass
+            _smtp = None
+
+# Threading headers are kept per conversation for a bounded number of recent conversations;
+# a conversation quiet for longer than the TTL starts a new email thread
+THREAD_INFO_MAX_CONVERSATIONS = 10000
+THREAD_INFO_TTL_SECONDS = 7 * 24 * 3600
+
+
 class EmailAgent(BaseRealEstateAgent):
     """
     Email Agent responsible for:
@@ -32,6 +64,134 @@ class EmailAgent(BaseRealEstateAgent):
     - Fallback when SMS fails
     """
     
+    # Email templates ({lead_name} and {property_address} placeholders, filled with format_map)
+    _INITIAL_SUBJECTS = {
+        "fix_flip": "Quick Cash Offer for Your Property - {property_address}",
+        "vacant_land": "Cash Offer for Your Land Near {property_address}",
+        "long_term_rental": "Cash Purchase Inquiry - {property_address}"
+    }
+    
+    _INITIAL_BODIES = {
+        "fix_flip": """Hi {lead_name},
+
+I hope this email finds you well. I noticed you might be the owner of the property at {property_address}, and I wanted to reach out about a potential opportunity.
+
+We're local real estate investors who specialize in purchasing homes for cash. We can:
+• Close quickly (as fast as 7 days)
+• Buy houses in any condition
+• Handle all the paperwork
+• Cover closing costs
+
+Would you be open to a no-obligation cash offer for your property? We make the process simple and straightforward.
+
+If you're interested, I'd be happy to schedule a quick 15-minute call to discuss your situation and see if we can help.
+
+Best regards,
+Derek
+Real Estate Solutions Team
+
+P.S. If you're not interested, just reply and let me know - I completely understand and won't contact you again.""",
+
+        "vacant_land": """Hi {lead_name},
+
+I hope you're doing well. My name is Derek, and I'm actively buying vacant land in your area.
+
+I noticed you own a parcel near {property_address}, and I wanted to see if you'd be interested in a cash offer. We specialize in making the land selling process simple and hassle-free:
+
+• All-cash purchases
+• Quick 15-minute consultation calls
+• No complicated paperwork
+• Fast closing process
+
+Would you be open to a brief conversation about your land? I can usually provide a cash range right over the phone after asking a few quick questions.
+
+You can reply to this email or we can schedule a quick call at your convenience.
+
+Best regards,
+Derek
+Land Investment Team
+
+P.S. If you're not interested in selling, just let me know and I won't reach out again.""",
+
+        "long_term_rental": """Hi {lead_name},
+
+I hope this message finds you well. I came across your property at {property_address} and wanted to reach out about a potential cash purchase opportunity.
+
+We specialize in purchasing rental properties and understand the unique challenges that come with them:
+• We can work around existing leases
+• Handle tenant communications if needed
+• Close quickly with all cash
+• Take the property as-is
+
+Whether your property is currently rented or vacant, we'd love to discuss a potential purchase that works for your timeline and situation.
+
+Would you be interested in a quick 15-minute call to explore this opportunity?
+
+Best regards,
+Derek
+Real Estate Investment Team
+
+P.S. If this isn't something you're interested in, just reply and let me know - no problem at all."""
+    }
+    
+    _QUALIFYING_SUBJECT = "Re: Your Property Inquiry - {property_address}"
+    _QUALIFYING_BODY = """Hi {lead_name},
+
+Thanks for your interest in our cash offer for {property_address}!
+
+To provide you with the most accurate offer, I'd like to ask a few quick questions about the property. This will help me give you a fair and competitive cash offer.
+
+Would you prefer to discuss this over a quick phone call, or would you like me to send the questions via email?
+
+Either way works great for me - I just want to make this as convenient as possible for you.
+
+Looking forward to hearing from you!
+
+Best regards,
+Derek
+Real Estate Solutions Team"""
+    
+    _FOLLOW_UP_SUBJECT = "Following up - Cash Offer for {property_address}"
+    _FOLLOW_UP_BODY = """Hi {lead_name},
+
+I wanted to follow up on my previous email about your property at {property_address}.
+
+I understand you're probably busy, but I didn't want you to miss out on this opportunity if you're interested in a cash offer.
+
+We're still very interested in purchasing your property and can move quickly if the numbers work for both of us.
+
+Would you like to schedule a brief call this week to discuss?
+
+Best regards,
+Derek
+Real Estate Solutions Team"""
+    
+    _FINAL_FOLLOW_UP_SUBJECT = "Final Follow-up - {property_address}"
+    _FINAL_FOLLOW_UP_BODY = """Hi {lead_name},
+
+This will be my final follow-up regarding your property at {property_address}.
+
+I don't want to be a bother, but I wanted to give you one last opportunity to explore a cash sale if you're interested.
+
+If now isn't the right time, I completely understand. Feel free to reach out in the future if your situation changes.
+
+Thanks for your time, and I wish you all the best!
+
+Best regards,
+Derek
+Real Estate Solutions Team"""
+    
+    _DEFAULT_SUBJECT = "Re: Your Property at {property_address}"
+    _DEFAULT_BODY = """Hi {lead_name},
+
+I wanted to reach out regarding your property at {property_address}.
+
+We're local real estate investors who can provide a quick, no-obligation cash offer. If you're interested in learning more, I'd be happy to schedule a brief call to discuss your situation.
+
+Best regards,
+Derek
+Real Estate Solutions Team"""
+    
     def __init__(self):
         super().__init__("email_agent")
         
@@ -47,8 +207,9 @@ class EmailAgent(BaseRealEstateAgent):
         
         self.compliance_checker = ComplianceChecker()
         
-        # Email threading storage
-        self.thread_info = {}
+        # Email threading storage - the agent is shared across graph executor threads
+        self.thread_info = TTLCache(maxsize=THREAD_INFO_MAX_CONVERSATIONS, ttl=THREAD_INFO_TTL_SECONDS)
+        self._thread_info_lock = threading.Lock()
     
     def process_message(self, state: RealEstateAgentState, user_message: str = None) -> Dict[str, Any]:
         """
@@ -66,8 +227,7 @@ class EmailAgent(BaseRealEstateAgent):
             
             # Update agent tracking
             state["current_agent"] = "email_agent"
-            if "email_agent" not in state["agent_history"]:
-                state["agent_history"].append("email_agent")
+            record_agent_visit(state, "email_agent")
             
             # Check if email service is available
             if not self.email_available:
@@ -106,9 +266,10 @@ class EmailAgent(BaseRealEstateAgent):
                     "subject": email_content["subject"]
                 })
                 
-                # Update state
+                # Update state (one timestamp for the state and its returned updates)
+                now_iso = datetime.now().isoformat()
                 state["last_contact_method"] = "email"
-                state["last_contact_time"] = datetime.now().isoformat()
+                state["last_contact_time"] = now_iso
                 state["email_failed"] = False
                 
                 # Store threading info for future emails
@@ -122,7 +283,7 @@ class EmailAgent(BaseRealEstateAgent):
                     "next_agent": "supervisor",
                     "state_updates": {
                         "last_contact_method": "email",
-                        "last_contact_time": datetime.now().isoformat(),
+                        "last_contact_time": now_iso,
                         "email_failed": False
                     }
                 }
@@ -149,177 +310,67 @@ class EmailAgent(BaseRealEstateAgent):
         else:
             return self._get_default_email_content(state)
     
+    def _template_fields(self, state: RealEstateAgentState) -> Dict[str, str]:
+        """
+        Placeholder values for the email templates
+        """
+        return {
+            "lead_name": state["lead_name"],
+            "property_address": state["property_address"]
+        }
+    
     def _get_initial_email_content(self, state: RealEstateAgentState) -> Dict[str, str]:
         """
         Get initial outreach email content
         """
-        lead_name = state["lead_name"]
-        property_address = state["property_address"]
         property_type = state["property_type"]
-        
-        subjects = {
-            "fix_flip": f"Quick Cash Offer for Your Property - {property_address}",
-            "vacant_land": f"Cash Offer for Your Land Near {property_address}",
-            "long_term_rental": f"Cash Purchase Inquiry - {property_address}"
-        }
-        
-        bodies = {
-            "fix_flip": f"""Hi {lead_name},
-
-I hope this email finds you well. I noticed you might be the owner of the property at {property_address}, and I wanted to reach out about a potential opportunity.
-
-We're local real estate investors who specialize in purchasing homes for cash. We can:
-• Close quickly (as fast as 7 days)
-• Buy houses in any condition
-• Handle all the paperwork
-• Cover closing costs
-
-Would you be open to a no-obligation cash offer for your property? We make the process simple and straightforward.
-
-If you're interested, I'd be happy to schedule a quick 15-minute call to discuss your situation and see if we can help.
-
-Best regards,
-Derek
-Real Estate Solutions Team
-
-P.S. If you're not interested, just reply and let me know - I completely understand and won't contact you again.""",
-
-            "vacant_land": f"""Hi {lead_name},
-
-I hope you're doing well. My name is Derek, and I'm actively buying vacant land in your area.
-
-I noticed you own a parcel near {property_address}, and I wanted to see if you'd be interested in a cash offer. We specialize in making the land selling process simple and hassle-free:
-
-• All-cash purchases
-• Quick 15-minute consultation calls
-• No complicated paperwork
-• Fast closing process
-
-Would you be open to a brief conversation about your land? I can usually provide a cash range right over the phone after asking a few quick questions.
-
-You can reply to this email or we can schedule a quick call at your convenience.
-
-Best regards,
-Derek
-Land Investment Team
-
-P.S. If you're not interested in selling, just let me know and I won't reach out again.""",
-
-            "long_term_rental": f"""Hi {lead_name},
-
-I hope this message finds you well. I came across your property at {property_address} and wanted to reach out about a potential cash purchase opportunity.
-
-We specialize in purchasing rental properties and understand the unique challenges that come with them:
-• We can work around existing leases
-• Handle tenant communications if needed
-• Close quickly with all cash
-• Take the property as-is
-
-Whether your property is currently rented or vacant, we'd love to discuss a potential purchase that works for your timeline and situation.
-
-Would you be interested in a quick 15-minute call to explore this opportunity?
-
-Best regards,
-Derek
-Real Estate Investment Team
-
-P.S. If this isn't something you're interested in, just reply and let me know - no problem at all."""
-        }
+        fields = self._template_fields(state)
         
         return {
-            "subject": subjects.get(property_type, subjects["fix_flip"]),
-            "body": bodies.get(property_type, bodies["fix_flip"])
+            "subject": self._INITIAL_SUBJECTS.get(property_type, self._INITIAL_SUBJECTS["fix_flip"]).format_map(fields),
+            "body": self._INITIAL_BODIES.get(property_type, self._INITIAL_BODIES["fix_flip"]).format_map(fields)
         }
     
     def _get_qualifying_email_content(self, state: RealEstateAgentState) -> Dict[str, str]:
         """
         Get qualifying email content
         """
-        lead_name = state["lead_name"]
-        property_address = state["property_address"]
+        fields = self._template_fields(state)
         
         return {
-            "subject": f"Re: Your Property Inquiry - {property_address}",
-            "body": f"""Hi {lead_name},
-
-Thanks for your interest in our cash offer for {property_address}!
-
-To provide you with the most accurate offer, I'd like to ask a few quick questions about the property. This will help me give you a fair and competitive cash offer.
-
-Would you prefer to discuss this over a quick phone call, or would you like me to send the questions via email?
-
-Either way works great for me - I just want to make this as convenient as possible for you.
-
-Looking forward to hearing from you!
-
-Best regards,
-Derek
-Real Estate Solutions Team"""
+            "subject": self._QUALIFYING_SUBJECT.format_map(fields),
+            "body": self._QUALIFYING_BODY.format_map(fields)
         }
     
     def _get_follow_up_email_content(self, state: RealEstateAgentState) -> Dict[str, str]:
         """
         Get follow-up email content
         """
-        lead_name = state["lead_name"]
-        property_address = state["property_address"]
+        fields = self._template_fields(state)
         
         follow_up_count = len([attempt for attempt in state["communication_attempts"] 
                               if attempt["method"] == "email"])
         
         if follow_up_count == 1:
             return {
-                "subject": f"Following up - Cash Offer for {property_address}",
-                "body": f"""Hi {lead_name},
-
-I wanted to follow up on my previous email about your property at {property_address}.
-
-I understand you're probably busy, but I didn't want you to miss out on this opportunity if you're interested in a cash offer.
-
-We're still very interested in purchasing your property and can move quickly if the numbers work for both of us.
-
-Would you like to schedule a brief call this week to discuss?
-
-Best regards,
-Derek
-Real Estate Solutions Team"""
+                "subject": self._FOLLOW_UP_SUBJECT.format_map(fields),
+                "body": self._FOLLOW_UP_BODY.format_map(fields)
             }
         else:
             return {
-                "subject": f"Final Follow-up - {property_address}",
-                "body": f"""Hi {lead_name},
-
-This will be my final follow-up regarding your property at {property_address}.
-
-I don't want to be a bother, but I wanted to give you one last opportunity to explore a cash sale if you're interested.
-
-If now isn't the right time, I completely understand. Feel free to reach out in the future if your situation changes.
-
-Thanks for your time, and I wish you all the best!
-
-Best regards,
-Derek
-Real Estate Solutions Team"""
+                "subject": self._FINAL_FOLLOW_UP_SUBJECT.format_map(fields),
+                "body": self._FINAL_FOLLOW_UP_BODY.format_map(fields)
             }
     
     def _get_default_email_content(self, state: RealEstateAgentState) -> Dict[str, str]:
         """
         Get default email content
         """
-        lead_name = state["lead_name"]
-        property_address = state["property_address"]
+        fields = self._template_fields(state)
         
         return {
-            "subject": f"Re: Your Property at {property_address}",
-            "body": f"""Hi {lead_name},
-
-I wanted to reach out regarding your property at {property_address}.
-
-We're local real estate investors who can provide a quick, no-obligation cash offer. If you're interested in learning more, I'd be happy to schedule a brief call to discuss your situation.
-
-Best regards,
-Derek
-Real Estate Solutions Team"""
+            "subject": self._DEFAULT_SUBJECT.format_map(fields),
+            "body": self._DEFAULT_BODY.format_map(fields)
         }
     
     def _format_user_message_as_email(self, state: RealEstateAgentState, message: str) -> Dict[str, str]:
@@ -333,49 +384,50 @@ Real Estate Solutions Team"""
             "body": message
         }
     
-    def _send_email(
+    def _build_email(
         self, 
         to_email: str, 
         subject: str, 
         message: str, 
-        state: RealEstateAgentState,
         threading_info: Dict[str, Any] = None
-    ) -> Dict[str, Any]:
+    ) -> MIMEMultipart:
         """
-        Send email with proper threading
+        Build the MIME message with threading headers and a fresh Message-ID
         """
-        try:
-            # Create message
-            msg = MIMEMultipart()
-            msg['From'] = self.gmail_address
-            msg['To'] = to_email
-            msg['Subject'] = subject
-            
-            # Add threading headers if available
-            if threading_info:
-                if threading_info.get('in_reply_to'):
-                    msg['In-Reply-To'] = threading_info['in_reply_to']
-                
-                if threading_info.get('references'):
-                    msg['References'] = threading_info['references']
-            
-            # Generate unique message ID
-            message_id = make_msgid()
-            msg['Message-ID'] = message_id
-            
-            # Add body
-            msg.attach(MIMEText(message, 'plain'))
-            
-            # Send via Gmail SMTP
-            server = smtplib.SMTP('smtp.gmail.com', 587)
-            server.starttls()
-            server.login(self.gmail_address, self.gmail_password)
-            
-            text = msg.as_string()
-            server.sendmail(self.gmail_address, to_email, text)
-            server.quit()
+        msg = MIMEMultipart()
+        msg['From'] = self.gmail_address
+        msg['To'] = to_email
+        msg['Subject'] = subject
+        
+        # Add threading headers if available
+        if threading_info:
+            if threading_info.get('in_reply_to'):
+                msg['In-Reply-To'] = threading_info['in_reply_to']
             
-            # Log successful send
+            if threading_info.get('references'):
+                msg['References'] = threading_info['references']
+        
+        # Generate unique message ID
+        msg['Message-ID'] = make_msgid()
+        
+        # Add body
+        msg.attach(MIMEText(message, 'plain'))
+        
+        return msg
+    
+    def _record_send(
+        self, 
+        state: RealEstateAgentState, 
+        to_email: str, 
+        subject: str, 
+        message: str, 
+        message_id: Optional[str] = None, 
+        error: Optional[Exception] = None
+    ) -> Dict[str, Any]:
+        """
+        Log the communication attempt and build the send result
+        """
+        if error is None:
             add_communication_attempt(
                 state,
                 method="email",
@@ -390,32 +442,95 @@ Real Estate Solutions Team"""
                 "to_email": to_email,
                 "subject": subject
             }
+        
+        error_msg = f"Failed to send email: {str(error)}"
+        self.logger.error(error_msg)
+        
+        # Log failed attempt
+        add_communication_attempt(
+            state,
+            method="email",
+            message=f"Subject: {subject}\n\n{message}",
+            success=False,
+            error=error_msg
+        )
+        
+        return {
+            "success": False,
+            "error": error_msg
+        }
+    
+    def _smtp_session(self) -> smtplib.SMTP:
+        """
+        Get the shared SMTP session, logging in on first use (caller holds _smtp_lock)
+        """
+        global _smtp
+        
+        if _smtp is None:
+            server = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT_SECONDS)
+            try:
+                server.starttls()
+                server.login(self.gmail_address, self.gmail_password)
+            except Exception:
+                server.close()
+                raise
+            _smtp = server
+        
+        return _smtp
+    
+    def _smtp_sendmail(self, to_email: str, text: str):
+        """
+        Send over the shared session, reconnecting once if the server dropped it (caller holds _smtp_lock)
+        """
+        global _smtp
+        
+        try:
+            self._smtp_session().sendmail(self.gmail_address, to_email, text)
+        except smtplib.SMTPServerDisconnected:
+            _smtp = None
+            self._smtp_session().sendmail(self.gmail_address, to_email, text)
+        except smtplib.SMTPException:
+            # Rejected by the server (bad recipient etc.) - the session itself is still usable
+            raise
+        except OSError:
+            # Socket-level failure: don't reuse a session in an unknown state
+            _smtp = None
+            raise
+    
+    def _send_email(
+        self, 
+        to_email: str, 
+        subject: str, 
+        message: str, 
+        state: RealEstateAgentState,
+        threading_info: Dict[str, Any] = None
+    ) -> Dict[str, Any]:
+        """
+        Send email with proper threading
+        """
+        try:
+            msg = self._build_email(to_email, subject, message, threading_info)
             
-        except Exception as e:
-            error_msg = f"Failed to send email: {str(e)}"
-            self.logger.error(error_msg)
-            
-            # Log failed attempt
-            add_communication_attempt(
-                state,
-                method="email",
-                message=f"Subject: {subject}\n\n{message}",
-                success=False,
-                error=error_msg
-            )
+            # Send via the shared Gmail SMTP session
+            with _smtp_lock:
+                self._smtp_sendmail(to_email, msg.as_string())
             
-            return {
-                "success": False,
-                "error": error_msg
-            }
+        except Exception as e:
+            return self._record_send(state, to_email, subject, message, error=e)
+        
+        return self._record_send(state, to_email, subject, message, message_id=msg['Message-ID'])
     
     def _get_threading_info(self, state: RealEstateAgentState) -> Dict[str, Any]:
         """
         Get email threading information for conversation continuity
         """
         conversation_id = state.get("conversation_id")
-        if conversation_id and conversation_id in self.thread_info:
-            return self.thread_info[conversation_id]
+        if conversation_id:
+            with self._thread_info_lock:
+                info = self.thread_info.get(conversation_id)
+                if info is not None:
+                    # Copy so a concurrent send can't change the headers while they're being built
+                    return {"references": list(info["references"]), "in_reply_to": info["in_reply_to"]}
         
         return {}
     
@@ -425,16 +540,19 @@ Real Estate Solutions Team"""
         """
         conversation_id = state.get("conversation_id")
         if conversation_id and message_id:
-            if conversation_id not in self.thread_info:
-                self.thread_info[conversation_id] = {
-                    "references": [],
-                    "in_reply_to": None
-                }
-            
-            # Update threading info
-            self.thread_info[conversation_id]["in_reply_to"] = message_id
-            if message_id not in self.thread_info[conversation_id]["references"]:
-                self.thread_info[conversation_id]["references"].append(message_id)
+            with self._thread_info_lock:
+                info = self.thread_info.get(conversation_id)
+                if info is None:
+                    info = {
+                        "references": [],
+                        "in_reply_to": None
+                    }
+                
+                # Update threading info (re-set so the conversation's TTL restarts)
+                info["in_reply_to"] = message_id
+                if message_id not in info["references"]:
+                    info["references"].append(message_id)
+                self.thread_info[conversation_id] = info
     
     def _handle_email_failure(self, state: RealEstateAgentState, reason: str) -> Dict[str, Any]:
         """
@@ -443,8 +561,10 @@ Real Estate Solutions Team"""
         self.log_agent_action(state, "email_failed", {"reason": reason})
         
         # Mark email as failed
+        error_message = f"Email failed: {reason}"
         state["email_failed"] = True
-        state["last_error"] = f"Email failed: {reason}"
+        state["last_error"] = error_message
+        state["last_error_lc"] = error_message.lower()
         
         return {
             "success": False,
@@ -453,7 +573,8 @@ Real Estate Solutions Team"""
             "next_agent": "supervisor",  # Let supervisor decide next steps
             "state_updates": {
                 "email_failed": True,
-                "last_error": f"Email failed: {reason}"
+                "last_error": error_message,
+                "last_error_lc": error_message.lower()
             }
         }
     
@@ -491,12 +612,17 @@ Real Estate Solutions Team"""
         """
 
 
+@lru_cache(maxsize=1)
+def _email_agent() -> EmailAgent:
+    """Build the email agent once per process; threading info is keyed by conversation"""
+    return EmailAgent()
+
+
 def email_agent_node(state: RealEstateAgentState) -> Dict[str, Any]:
     """
     Node function for email agent in LangGraph
     """
-    agent = EmailAgent()
-    return agent.process_message(state)
+    return _email_agent().process_message(state)
 
 
 def route_email_result(state: RealEstateAgentState) -> str:
@@ -512,46 +638,41 @@ def route_email_result(state: RealEstateAgentState) -> str:
 
 
 # Utility functions for email management
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
 def get_email_stats(lead_id: str) -> Dict[str, Any]:
     """
     Get email statistics for a lead
     """
-    import sqlite3
-    
-    conn = sqlite3.connect("agent_estate.db")
     try:
         # Get email message counts
-        stats = conn.execute("""
-            SELECT 
-                COUNT(*) as total_emails,
-                SUM(CASE WHEN ai_generated = 1 THEN 1 ELSE 0 END) as ai_emails,
-                MAX(timestamp) as last_email
-            FROM messages m
-            JOIN conversations c ON m.conversation_id = c.id
-            WHERE c.lead_id = ? AND m.method = 'email'
-        """, (lead_id,)).fetchone()
+        with get_db_pool().read() as conn:
+            total_emails, ai_emails, last_email = conn.execute("""
+                SELECT 
+                    COUNT(*) as total_emails,
+                    SUM(CASE WHEN ai_generated = 1 THEN 1 ELSE 0 END) as ai_emails,
+                    MAX(timestamp) as last_email
+                FROM messages m
+                JOIN conversations c ON m.conversation_id = c.id
+                WHERE c.lead_id = ? AND m.method = 'email'
+            """, (lead_id,)).fetchone()
         
         return {
-            "total_emails": stats["total_emails"] or 0,
-            "ai_generated": stats["ai_emails"] or 0,
-            "last_email": stats["last_email"]
+            "total_emails": total_emails or 0,
+            "ai_generated": ai_emails or 0,
+            "last_email": last_email
         }
         
     except Exception as e:
         return {"error": str(e)}
-    finally:
-        conn.close()
 
 
 def validate_email_address(email: str) -> Dict[str, Any]:
     """
     Validate email address format
     """
-    import re
-    
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    
-    if re.match(pattern, email):
+    # Cheap rejects first: no @ at all, or longer than an SMTP path allows (RFC 5321)
+    if '@' in email and len(email) <= 254 and _EMAIL_RE.match(email):
         return {
             "valid": True,
             "email": email.lower()
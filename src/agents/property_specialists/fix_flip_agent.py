@@ -16,7 +16,8 @@ from schemas.agent_state import (
     RealEstateAgentState, 
     update_state_timestamp,
     update_qualification_data,
-    advance_conversation_stage
+    advance_conversation_stage,
+    record_agent_visit
 )
 
 
@@ -54,8 +55,7 @@ class FixFlipSpecialistAgent(BaseRealEstateAgent):
             
             # Update agent tracking
             state["current_agent"] = "fix_flip_agent"
-            if "fix_flip_agent" not in state["agent_history"]:
-                state["agent_history"].append("fix_flip_agent")
+            record_agent_visit(state, "fix_flip_agent")
             
             # Determine conversation stage and next action
             if user_message:
@@ -16,7 +16,8 @@ from schemas.agent_state import (
     RealEstateAgentState, 
     update_state_timestamp,
     update_qualification_data,
-    advance_conversation_stage
+    advance_conversation_stage,
+    record_agent_visit
 )
 
 
@@ -55,8 +56,7 @@ class RentalPropertySpecialistAgent(BaseRealEstateAgent):
             
             # Update agent tracking
             state["current_agent"] = "rental_agent"
-            if "rental_agent" not in state["agent_history"]:
-                state["agent_history"].append("rental_agent")
+            record_agent_visit(state, "rental_agent")
             
             # Determine conversation stage and next action
             if user_message:
@@ -16,7 +16,8 @@ from schemas.agent_state import (
     RealEstateAgentState, 
     update_state_timestamp,
     update_qualification_data,
-    advance_conversation_stage
+    advance_conversation_stage,
+    record_agent_visit
 )
 
 
@@ -54,8 +55,7 @@ class VacantLandSpecialistAgent(BaseRealEstateAgent):
             
             # Update agent tracking
             state["current_agent"] = "vacant_land_agent"
-            if "vacant_land_agent" not in state["agent_history"]:
-                state["agent_history"].append("vacant_land_agent")
+            record_agent_visit(state, "vacant_land_agent")
             
             # Determine conversation stage and next action
             if user_message:
@@ -4,6 +4,7 @@ Handles SMS communication with compliance and delivery tracking
 """
 
 import os
+import re
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -15,10 +16,16 @@ from services.telnyx_service import TelnyxSMSService, format_phone_number, valid
 from schemas.agent_state import (
     RealEstateAgentState, 
     update_state_timestamp,
-    add_communication_attempt
+    add_communication_attempt,
+    refresh_communication_counters,
+    record_agent_visit
 )
 
 
+# Replies that move a qualifying lead to booking; matched as substrings of the lowercased message
+_BOOKING_KEYWORD_PATTERN = re.compile("call|schedule|appointment|meeting|yes|interested")
+
+
 class SMSAgent(BaseRealEstateAgent):
     """
     SMS Agent responsible for:
@@ -59,8 +66,7 @@ class SMSAgent(BaseRealEstateAgent):
             
             # Update agent tracking
             state["current_agent"] = "sms_agent"
-            if "sms_agent" not in state["agent_history"]:
-                state["agent_history"].append("sms_agent")
+            record_agent_visit(state, "sms_agent")
             
             # Check if this is an inbound response (conversation mode)
             if state.get("conversation_mode") == "inbound_response":
@@ -211,8 +217,7 @@ class SMSAgent(BaseRealEstateAgent):
             state["conversation_stage"] = "qualifying"
         elif current_stage == "qualifying":
             # Check if ready for booking
-            booking_keywords = ["call", "schedule", "appointment", "meeting", "yes", "interested"]
-            if any(keyword in message.lower() for keyword in booking_keywords):
+            if _BOOKING_KEYWORD_PATTERN.search(message.lower()):
                 state["conversation_stage"] = "booking"
             else:
                 state["conversation_stage"] = "qualifying"
@@ -369,9 +374,7 @@ class SMSAgent(BaseRealEstateAgent):
         # Skip DNC blocking since all leads are pre-screened
         
         # Check daily SMS limits
-        daily_sms_count = len([attempt for attempt in state["communication_attempts"] 
-                              if attempt["method"] == "sms" and 
-                              datetime.fromisoformat(attempt["timestamp"]).date() == datetime.now().date()])
+        daily_sms_count = refresh_communication_counters(state)["sms_count_today"]
         
         if daily_sms_count >= 5:  # Max 5 SMS per day per lead
             return {
@@ -391,8 +394,10 @@ class SMSAgent(BaseRealEstateAgent):
         self.log_agent_action(state, "sms_fallback_to_email", {"reason": reason})
         
         # Mark SMS as failed
+        error_message = f"SMS failed: {reason}"
         state["sms_failed"] = True
-        state["last_error"] = f"SMS failed: {reason}"
+        state["last_error"] = error_message
+        state["last_error_lc"] = error_message.lower()
         
         return {
             "success": True,
@@ -402,7 +407,8 @@ class SMSAgent(BaseRealEstateAgent):
             "state_updates": {
                 "sms_failed": True,
                 "preferred_channel": "email",
-                "last_error": f"SMS failed: {reason}"
+                "last_error": error_message,
+                "last_error_lc": error_message.lower()
             }
         }
     
@@ -17,7 +17,8 @@ from agents.base_agent import BaseRealEstateAgent, ComplianceChecker
 from schemas.agent_state import (
     RealEstateAgentState, 
     update_state_timestamp,
-    add_communication_attempt
+    add_communication_attempt,
+    record_agent_visit
 )
 
 
@@ -44,8 +45,7 @@ class SupervisorAgent(BaseRealEstateAgent):
             
             # Update agent tracking
             state["current_agent"] = "supervisor"
-            if "supervisor" not in state["agent_history"]:
-                state["agent_history"].append("supervisor")
+            record_agent_visit(state, "supervisor")
             
             # Check if this is initial contact or response processing
             if user_message is None:
@@ -70,7 +70,10 @@ class SupervisorAgent(BaseRealEstateAgent):
             return {
                 "next_agent": "END",
                 "action": "compliance_failed",
-                "state_updates": {"last_error": "Compliance check failed"}
+                "state_updates": {
+                    "last_error": "Compliance check failed",
+                    "last_error_lc": "compliance check failed"
+                }
             }
         
         # Update compliance info in state
@@ -147,7 +150,7 @@ class SupervisorAgent(BaseRealEstateAgent):
             len(state["objections_handled"]) > 5,
             state["conversation_sentiment"] == "negative",
             state["no_show_count"] > 2,
-            "legal" in str(state.get("last_error", "")).lower()
+            "legal" in (state.get("last_error_lc") or "")
         ]
         
         return any(escalation_conditions)
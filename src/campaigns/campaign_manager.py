@@ -1,6 +1,10 @@
 import os
+import re
 import asyncio
-from typing import Dict, Any, Optional, List
+from functools import lru_cache
+from string import Template
+from types import MappingProxyType
+from typing import Dict, Any, Optional, List, Mapping
 from datetime import datetime, timedelta
 import uuid
 import json
@@ -13,6 +17,97 @@ from integrations.google_meet_integration import GoogleMeetIntegration
 from integrations.gmail_integration import GmailIntegration
 from agents.conversation_agent import ConversationAgent
 
+# Matches the {name}/{address} placeholders used in template text
+_PLACEHOLDER_RE = re.compile(r"\{(\w+)\}")
+
+def _compile_template(raw: str) -> Template:
+    """Convert a {placeholder} message into a string.Template (parsed once, reused per send)"""
+    return Template(_PLACEHOLDER_RE.sub(r"${\1}", raw.replace("$", "$$")))
+
+def render_template(template: Template, lead: Lead) -> str:
+    """Personalize a compiled campaign message for a lead"""
+    return template.safe_substitute(
+        name=lead.first_name or "there",
+        address=lead.property_address
+    )
+
+def _freeze(value: Any) -> Any:
+    """Recursively make template data read-only (dicts -> MappingProxyType, lists -> tuples)"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+@lru_cache(maxsize=1)
+def _build_campaign_templates() -> Mapping[PropertyType, Mapping[str, Any]]:
+    """Build campaign templates once per process; shared read-only across campaigns"""
+    
+    # These would be loaded from your Google Docs content
+    # For now, providing basic templates
+    
+    templates = {
+        PropertyType.FIX_FLIP: {
+            "initial_message": "Hi {name}! I saw your property at {address}. I buy houses for cash and can close quickly. Are you interested in a no-obligation offer? Text STOP to opt out.",
+            "follow_up_sequences": {
+                "interested": [
+                    "Great! What condition is the property in? Any major repairs needed?",
+                    "Thanks for the info. What's your timeline for selling?",
+                    "Perfect. I'd like to schedule a quick call to discuss your options. When works best for you?"
+                ],
+                "no_show": [
+                    "Hi {name}, we missed our call. Still interested in getting an offer? Reply YES to reschedule."
+                ],
+                "general": [
+                    "Hi {name}, following up about your property. Any updates on your selling timeline?",
+                    "Just checking in one more time about {address}. Let me know if you'd like to discuss options."
+                ]
+            }
+        },
+        PropertyType.RENTAL: {
+            "initial_message": "Hi {name}! I'm interested in your rental property at {address}. I buy investment properties for cash. Would you consider an offer? Text STOP to opt out.",
+            "follow_up_sequences": {
+                "interested": [
+                    "Excellent! Is the property currently rented? What's the monthly income?",
+                    "Thanks. Are you dealing with any tenant or management issues?",
+                    "I'd love to discuss how I can help. When's a good time for a brief call?"
+                ]
+            }
+        },
+        PropertyType.VACANT_LAND: {
+            "initial_message": "Hi {name}! I buy vacant land for cash and can close quickly. Interested in an offer for your property at {address}? Text STOP to opt out.",
+            "follow_up_sequences": {
+                "interested": [
+                    "Great! How many acres is the land?",
+                    "What's the zoning designation? Any development restrictions?",
+                    "Perfect. Let's schedule a call to discuss your options. When works for you?"
+                ]
+            }
+        }
+    }
+    
+    # Compile follow-ups once; raw strings stay available under their original keys
+    for template in templates.values():
+        template["follow_up_sequences_compiled"] = {
+            status: [_compile_template(message) for message in messages]
+            for status, messages in template["follow_up_sequences"].items()
+        }
+    
+    return _freeze(templates)
+
+# Fallback follow-ups when a property type has no sequence for the lead's status
+_DEFAULT_FOLLOW_UPS = {
+    "no_show": (_compile_template(
+        "Hi {name}, I noticed we missed our scheduled call. Are you still interested in discussing your property? Reply YES to reschedule."
+    ),),
+    "interested": (_compile_template(
+        "Hi {name}, following up on your property at {address}. When would be a good time for a quick call to discuss your options?"
+    ),),
+    "general": (_compile_template(
+        "Hi {name}, just checking back about your property. Any updates on your timeline for selling?"
+    ),)
+}
+
 class CampaignManager:
     def __init__(self):
         self.db = DatabaseManager()
@@ -93,47 +188,83 @@ class CampaignManager:
         errors = []
         
         max_daily_contacts = int(os.getenv("MAX_DAILY_CONTACTS", "100"))
-        delay_between_messages = 30  # seconds
+        max_concurrent_sends = int(os.getenv("MAX_CONCURRENT_SENDS", "10"))
+        delay_between_messages = 30  # seconds between waves of concurrent sends
         
-        for lead in leads:
-            try:
+        # Only successful sends count against the daily limit. In-flight sends hold a
+        # reservation so concurrent slots can't overshoot it.
+        sends_reserved = 0
+        sends_succeeded = 0
+        daily_limit_reached = asyncio.Event()
+        
+        # Sends are I/O-bound, so run them concurrently with a bounded number of slots
+        send_slots = asyncio.Semaphore(max_concurrent_sends)
+        
+        async def send_initial_outreach(lead: Lead, wave: int) -> Optional[bool]:
+            nonlocal sends_reserved, sends_succeeded
+            
+            # Rate limiting delay - wave N starts N windows after the first, without holding a slot
+            if wave:
+                try:
+                    await asyncio.wait_for(daily_limit_reached.wait(), timeout=wave * delay_between_messages)
+                except asyncio.TimeoutError:
+                    pass
+            
+            async with send_slots:
                 # Check if we've hit daily limit
-                if processed >= max_daily_contacts:
-                    break
+                if daily_limit_reached.is_set() or sends_reserved >= max_daily_contacts:
+                    return None
                 
-                # Check compliance
+                # Check compliance right before sending; quiet hours may have started meanwhile
                 if not self.compliance.can_contact(lead.phone):
                     self.compliance.log_contact_attempt(
                         lead.phone, "sms", False, "compliance_blocked"
                     )
-                    continue
-                
-                # Generate initial message
-                initial_message = await self.conversation_agent.send_initial_message(lead)
+                    return None
                 
-                # Send message via Telnyx
-                success = await self.telnyx.send_sms(lead.phone, initial_message)
+                sends_reserved += 1
+                success = False
+                try:
+                    # Generate initial message
+                    initial_message = await self.conversation_agent.send_initial_message(lead)
+                    
+                    # Send message via Telnyx
+                    success = await self.telnyx.send_sms(lead.phone, initial_message)
+                finally:
+                    if not success:
+                        sends_reserved -= 1
                 
                 if success:
+                    sends_succeeded += 1
+                    if sends_succeeded >= max_daily_contacts:
+                        daily_limit_reached.set()
+                    
                     # Update lead status
                     lead.status = LeadStatus.CONTACTED
                     lead.last_contact_date = datetime.utcnow()
                     await self.db.update_lead(lead)
                     
-                    processed += 1
-                    
                     # Log compliance
                     self.compliance.log_contact_attempt(
                         lead.phone, "sms", True, "initial_outreach"
                     )
-                else:
-                    errors.append(f"Failed to send message to {lead.phone}")
                 
-                # Rate limiting delay
-                await asyncio.sleep(delay_between_messages)
-                
-            except Exception as e:
-                errors.append(f"Error processing lead {lead.id}: {str(e)}")
+                return success
+        
+        results = await asyncio.gather(
+            *(send_initial_outreach(lead, index // max_concurrent_sends) for index, lead in enumerate(leads)),
+            return_exceptions=True
+        )
+        
+        for lead, result in zip(leads, results):
+            if isinstance(result, Exception):
+                errors.append(f"Error processing lead {lead.id}: {str(result)}")
+            elif result is None:
+                continue  # Skipped: compliance blocked or daily limit reached
+            elif result:
+                processed += 1
+            else:
+                errors.append(f"Failed to send message to {lead.phone}")
         
         # Update campaign tracking
         if campaign_id in self.active_campaigns:
@@ -217,33 +348,24 @@ class CampaignManager:
         """Generate appropriate follow-up message based on lead status"""
         
         template = self.templates.get(lead.property_type, {})
-        follow_up_sequences = template.get("follow_up_sequences", {})
+        follow_up_sequences = template.get("follow_up_sequences_compiled", {})
         
         # Get appropriate follow-up sequence based on lead status
         if lead.status == LeadStatus.NO_SHOW:
-            messages = follow_up_sequences.get("no_show", [
-                "Hi {name}, I noticed we missed our scheduled call. Are you still interested in discussing your property? Reply YES to reschedule."
-            ])
+            sequence = "no_show"
         elif lead.status == LeadStatus.INTERESTED:
-            messages = follow_up_sequences.get("interested", [
-                "Hi {name}, following up on your property at {address}. When would be a good time for a quick call to discuss your options?"
-            ])
+            sequence = "interested"
         else:
-            messages = follow_up_sequences.get("general", [
-                "Hi {name}, just checking back about your property. Any updates on your timeline for selling?"
-            ])
+            sequence = "general"
+        
+        messages = follow_up_sequences.get(sequence) or _DEFAULT_FOLLOW_UPS[sequence]
         
         # Select message based on follow-up count
         follow_up_count = len([msg for msg in lead.conversation_history if msg.get("direction") == "outbound"])
         message_index = min(follow_up_count - 1, len(messages) - 1)
         
-        message = messages[message_index]
-        
         # Personalize message
-        return message.format(
-            name=lead.first_name or "there",
-            address=lead.property_address
-        )
+        return render_template(messages[message_index], lead)
     
     def _calculate_next_follow_up(self, lead: Lead) -> datetime:
         """Calculate next follow-up date based on lead status and history"""
@@ -271,53 +393,9 @@ class CampaignManager:
             conn.commit()
             return cursor.rowcount > 0
     
-    def _load_campaign_templates(self) -> Dict[PropertyType, CampaignTemplate]:
+    def _load_campaign_templates(self) -> Mapping[PropertyType, Mapping[str, Any]]:
         """Load campaign templates for different property types"""
-        
-        # These would be loaded from your Google Docs content
-        # For now, providing basic templates
-        
-        templates = {
-            PropertyType.FIX_FLIP: {
-                "initial_message": "Hi {name}! I saw your property at {address}. I buy houses for cash and can close quickly. Are you interested in a no-obligation offer? Text STOP to opt out.",
-                "follow_up_sequences": {
-                    "interested": [
-                        "Great! What condition is the property in? Any major repairs needed?",
-                        "Thanks for the info. What's your timeline for selling?",
-                        "Perfect. I'd like to schedule a quick call to discuss your options. When works best for you?"
-                    ],
-                    "no_show": [
-                        "Hi {name}, we missed our call. Still interested in getting an offer? Reply YES to reschedule."
-                    ],
-                    "general": [
-                        "Hi {name}, following up about your property. Any updates on your selling timeline?",
-                        "Just checking in one more time about {address}. Let me know if you'd like to discuss options."
-                    ]
-                }
-            },
-            PropertyType.RENTAL: {
-                "initial_message": "Hi {name}! I'm interested in your rental property at {address}. I buy investment properties for cash. Would you consider an offer? Text STOP to opt out.",
-                "follow_up_sequences": {
-                    "interested": [
-                        "Excellent! Is the property currently rented? What's the monthly income?",
-                        "Thanks. Are you dealing with any tenant or management issues?",
-                        "I'd love to discuss how I can help. When's a good time for a brief call?"
-                    ]
-                }
-            },
-            PropertyType.VACANT_LAND: {
-                "initial_message": "Hi {name}! I buy vacant land for cash and can close quickly. Interested in an offer for your property at {address}? Text STOP to opt out.",
-                "follow_up_sequences": {
-                    "interested": [
-                        "Great! How many acres is the land?",
-                        "What's the zoning designation? Any development restrictions?",
-                        "Perfect. Let's schedule a call to discuss your options. When works for you?"
-                    ]
-                }
-            }
-        }
-        
-        return templates
+        return _build_campaign_templates()
     
     async def handle_no_shows(self) -> Dict[str, Any]:
         """Check for no-shows and update lead status"""
@@ -1,4 +1,5 @@
 import os
+import re
 import pytz
 from datetime import datetime, time
 from typing import Dict, Any, Optional, List, Set
@@ -8,6 +9,10 @@ import requests
 import json
 import logging
 
+# Plainly formatted US numbers skip phonenumbers.parse; the result is still checked with
+# is_valid_number, so the fast path only saves time and never changes the answer
+_US_PHONE_PATTERN = re.compile(r"\s*(?:\+?1[\s.-]?)?(?:\(([2-9]\d{2})\)|([2-9]\d{2}))[\s.-]?([2-9]\d{2})[\s.-]?(\d{4})\s*")
+
 class DatabaseManager:
     # This is a placeholder class for a database manager
     pass
@@ -21,6 +26,10 @@ class ComplianceChecker:
         self.quiet_hours_end = self._parse_time(os.getenv("QUIET_HOURS_END", "08:00"))
         self.timezone = pytz.timezone(os.getenv("TIMEZONE", "America/New_York"))
         
+        # Quiet hours as minute-of-day so the per-message check is plain integer compares
+        self._quiet_start_minute = self.quiet_hours_start.hour * 60 + self.quiet_hours_start.minute
+        self._quiet_end_minute = self.quiet_hours_end.hour * 60 + self.quiet_hours_end.minute
+        
         # Opt-out keywords (based on project compliance requirements)
         self.opt_out_keywords = [
             "stop", "unsubscribe", "remove", "opt out", "opt-out",
@@ -30,7 +39,7 @@ class ComplianceChecker:
         # Compliance logging for TCPA requirements
         self.logger = logging.getLogger(__name__)
         
-        # In-memory opt-out list (in production, use database)
+        # In-memory opt-out set of normalized E.164 numbers (in production, use database)
         self.opt_out_numbers: Set[str] = set()
     
     def can_contact(self, phone_number: str) -> bool:
@@ -70,6 +79,16 @@ class ComplianceChecker:
     
     def _normalize_phone(self, phone_number: str) -> Optional[str]:
         """Normalize phone number to E.164 format"""
+        if not phone_number:
+            return None
+        
+        # Common US formats skip the full parser
+        match = _US_PHONE_PATTERN.fullmatch(str(phone_number))
+        if match:
+            national_number = "".join(group for group in match.groups() if group)
+            parsed = phonenumbers.PhoneNumber(country_code=1, national_number=int(national_number))
+            return "+1" + national_number if phonenumbers.is_valid_number(parsed) else None
+        
         try:
             # Parse the phone number (assuming US if no country code)
             parsed = phonenumbers.parse(phone_number, "US")
@@ -85,13 +104,14 @@ class ComplianceChecker:
     
     def _is_quiet_hours(self) -> bool:
         """Check if current time is within quiet hours"""
-        now = datetime.now(self.timezone).time()
+        now = datetime.now(self.timezone)
+        minute = now.hour * 60 + now.minute
         
         # Handle case where quiet hours span midnight
-        if self.quiet_hours_start > self.quiet_hours_end:
-            return now >= self.quiet_hours_start or now <= self.quiet_hours_end
+        if self._quiet_start_minute > self._quiet_end_minute:
+            return minute >= self._quiet_start_minute or minute < self._quiet_end_minute
         else:
-            return self.quiet_hours_start <= now <= self.quiet_hours_end
+            return self._quiet_start_minute <= minute < self._quiet_end_minute
     
     
     def _parse_time(self, time_str: str) -> time:
@@ -139,15 +159,17 @@ class ComplianceChecker:
     
     def log_contact_attempt(self, phone_number: str, method: str, success: bool, reason: str = None):
         """Log contact attempt for compliance tracking"""
+        normalized_phone = self._normalize_phone(phone_number)
+        
         log_entry = {
             "timestamp": datetime.utcnow().isoformat(),
-            "phone_number": self._normalize_phone(phone_number),
+            "phone_number": normalized_phone,
             "method": method,
             "success": success,
             "reason": reason,
             "compliance_checks": {
                 "quiet_hours": not self._is_quiet_hours(),
-                "opt_out_status": phone_number not in self.opt_out_numbers,
+                "opt_out_status": normalized_phone not in self.opt_out_numbers,
                 "pre_approved": True  # All numbers are pre-approved
             }
         }
@@ -1,20 +1,23 @@
 from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse
 from pathlib import Path
 import uvicorn
-from typing import Dict, Any, List, Optional
-from pydantic import BaseModel
+from typing import Dict, Any, List, Optional, Tuple
+from pydantic import BaseModel, Field
 from datetime import datetime
 import uuid
 import sqlite3
 import json
 import os
+import asyncio
 import threading
+import secrets
+from functools import lru_cache
 # Email monitoring removed - using direct agent communication
 
-app = FastAPI(title="AI Real Estate Outreach Agent", version="1.0.0")
+app = FastAPI(title="AI Real Estate Outreach Agent", version="1.0.0", default_response_class=ORJSONResponse)
 
 # Add CORS middleware
 app.add_middleware(
@@ -74,6 +77,18 @@ class LeadCreate(BaseModel):
     condition: Optional[str] = None
     notes: Optional[str] = None
 
+class TelnyxInboundSMS(BaseModel):
+    class Data(BaseModel):
+        class Payload(BaseModel):
+            from_: Dict[str, Any] = Field(default_factory=dict, alias="from")
+            to: List[Dict[str, Any]] = Field(default_factory=list)
+            text: Optional[str] = None
+        
+        event_type: str
+        payload: Payload = Field(default_factory=Payload)
+    
+    data: Data
+
 # Initialize database
 class Database:
     def __init__(self, db_path: str = "agent_estate.db"):
@@ -145,12 +160,27 @@ class Database:
             )
         ''')
         
+        # Per-lead message stats: seek conversations by lead, then read messages from the index alone
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_conv_lead ON conversations(lead_id, id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_msg_conv ON messages(conversation_id, method, ai_generated, timestamp)")
+        
         conn.commit()
         conn.close()
 
 # Initialize database
 db = Database("agent_estate.db")
 
+# Inbound SMS queue - the webhook only enqueues, a background consumer does the AI work
+SMS_BATCH_SIZE = 16
+SMS_DRAIN_TIMEOUT = 30  # seconds to finish queued SMS on shutdown
+sms_inbox: Optional[asyncio.Queue] = None
+sms_consumer_task: Optional[asyncio.Task] = None
+
+# Google Calendar push notifications - invalidate cached availability when the calendar changes
+GOOGLE_CALENDAR_WEBHOOK_URL = os.getenv("GOOGLE_CALENDAR_WEBHOOK_URL")
+GOOGLE_CALENDAR_WEBHOOK_TOKEN = os.getenv("GOOGLE_CALENDAR_WEBHOOK_TOKEN")
+calendar_watch: Optional[Dict[str, Any]] = None
+
 # Startup and shutdown events
 @app.on_event("startup")
 async def startup_event():
@@ -164,12 +194,55 @@ async def startup_event():
     else:
         print("❌ Database initialization failed")
     
+    # Start inbound SMS consumer
+    global sms_inbox, sms_consumer_task
+    sms_inbox = asyncio.Queue(maxsize=10000)
+    sms_consumer_task = asyncio.create_task(consume_incoming_sms(sms_inbox))
+    
+    # Subscribe to calendar change notifications
+    global calendar_watch
+    if GOOGLE_CALENDAR_WEBHOOK_URL and GOOGLE_CALENDAR_WEBHOOK_TOKEN:
+        from agents.booking_agent import BookingAgent
+        calendar_watch = await asyncio.to_thread(
+            BookingAgent().start_calendar_watch,
+            GOOGLE_CALENDAR_WEBHOOK_URL,
+            GOOGLE_CALENDAR_WEBHOOK_TOKEN
+        )
+        if calendar_watch:
+            print("✅ Google Calendar push notifications enabled")
+    elif GOOGLE_CALENDAR_WEBHOOK_URL:
+        print("⚠️ GOOGLE_CALENDAR_WEBHOOK_TOKEN not set - calendar push notifications disabled")
+    
     print("✅ System ready for real estate outreach")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Shutdown event"""
     print("🛑 Shutting down AI Real Estate Agent Backend...")
+    
+    if sms_consumer_task:
+        # Messages already acked by the webhook must still be processed
+        try:
+            await asyncio.wait_for(sms_inbox.join(), timeout=SMS_DRAIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            print(f"⚠️ {sms_inbox.qsize()} queued SMS not processed before shutdown")
+        sms_consumer_task.cancel()
+    
+    if calendar_watch:
+        from agents.booking_agent import BookingAgent
+        await asyncio.to_thread(
+            BookingAgent().stop_calendar_watch,
+            calendar_watch["channel_id"],
+            calendar_watch["resource_id"]
+        )
+    
+    # Close the shared HTTP client used by the integrations
+    from integrations._http import aclose_client
+    await aclose_client()
+    
+    # Close the shared Gmail SMTP session
+    from agents.email_agent import close_smtp_connection
+    await asyncio.to_thread(close_smtp_connection)
 
 # API Routes
 @app.get("/")
@@ -774,62 +847,144 @@ async def send_message(lead_id: str, message_data: dict):
 
 # Webhook endpoint for Telnyx SMS
 @app.post("/webhooks/telnyx")
-async def telnyx_webhook(request: Request):
+async def telnyx_webhook(evt: TelnyxInboundSMS):
     """Handle incoming Telnyx webhooks (SMS messages)"""
     try:
-        payload = await request.body()
-        data = json.loads(payload)
-        
-        print(f"📱 Received webhook: {data}")
+        print(f"📱 Received webhook: {evt.data.event_type}")
         
         # Check if it's an SMS message
-        if data.get("data", {}).get("event_type") == "message.received":
-            message_data = data["data"]["payload"]
-            
-            from_number = message_data.get("from", {}).get("phone_number")
-            message_text = message_data.get("text")
-            to_number = message_data.get("to", [{}])[0].get("phone_number")
-            
-            print(f"📨 SMS from {from_number}: {message_text}")
-            
-            # Process the message through your AI system
-            await process_incoming_sms(from_number, message_text, to_number)
-            
+        if evt.data.event_type != "message.received":
+            return {"status": "ignored"}
+        
+        message_data = evt.data.payload
+        
+        from_number = message_data.from_.get("phone_number")
+        message_text = message_data.text
+        to_number = message_data.to[0].get("phone_number") if message_data.to else None
+        
+        print(f"📨 SMS from {from_number}: {message_text}")
+        
+        # Queue the message for the AI system and acknowledge immediately
+        await sms_inbox.put((from_number, message_text, to_number))
+        
         return {"status": "received"}
         
     except Exception as e:
         print(f"❌ Webhook error: {e}")
         return {"status": "error", "message": str(e)}
 
-async def process_incoming_sms(from_number: str, message: str, to_number: str):
+# Webhook endpoint for Google Calendar push notifications
+@app.post("/webhooks/google-calendar")
+async def google_calendar_webhook(request: Request):
+    """Drop cached calendar availability when Google reports a change"""
+    channel_token = request.headers.get("X-Goog-Channel-Token", "")
+    if not GOOGLE_CALENDAR_WEBHOOK_TOKEN or not secrets.compare_digest(channel_token, GOOGLE_CALENDAR_WEBHOOK_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid channel token")
+    
+    # "sync" is the handshake sent when the channel is created; anything else is a change
+    if request.headers.get("X-Goog-Resource-State") != "sync":
+        from agents.booking_agent import invalidate_freebusy_cache
+        invalidate_freebusy_cache()
+    
+    return {"status": "received"}
+
+async def consume_incoming_sms(inbox: asyncio.Queue):
+    """Drain queued SMS in small batches; phones run concurrently, each phone's messages in order"""
+    while True:
+        batch = [await inbox.get()]
+        try:
+            while len(batch) < SMS_BATCH_SIZE:
+                batch.append(inbox.get_nowait())
+        except asyncio.QueueEmpty:
+            pass
+        
+        try:
+            # Group by sender so one lead's messages never race each other
+            messages_by_phone: Dict[str, List[Tuple[str, str]]] = {}
+            for from_number, message, to_number in batch:
+                messages_by_phone.setdefault(from_number, []).append((message, to_number))
+            
+            # One lead lookup for the whole batch, off the event loop
+            try:
+                leads_by_phone = await asyncio.to_thread(get_leads_by_phone, list(messages_by_phone))
+            except Exception as e:
+                print(f"❌ Batch lead lookup failed, falling back to per-phone lookups: {e}")
+                leads_by_phone = None
+            
+            await asyncio.gather(*(
+                process_phone_messages(from_number, messages, leads_by_phone)
+                for from_number, messages in messages_by_phone.items()
+            ))
+        except Exception as e:
+            print(f"❌ Error processing SMS batch: {e}")
+        finally:
+            for _ in batch:
+                inbox.task_done()
+
+async def process_phone_messages(from_number: str, messages: List[Tuple[str, str]],
+                                 leads_by_phone: Optional[Dict[str, sqlite3.Row]]):
+    """Process one sender's queued messages in arrival order"""
+    if leads_by_phone is None:
+        try:
+            leads_by_phone = await asyncio.to_thread(get_leads_by_phone, [from_number])
+        except Exception as e:
+            print(f"❌ Lead lookup failed for {from_number}, dropping {len(messages)} message(s): {e}")
+            return
+    
+    lead = leads_by_phone.get(from_number)
+    # An unknown number keeps a single lead id across all of its messages
+    new_lead_id = None if lead else str(uuid.uuid4())
+    
+    for message, to_number in messages:
+        try:
+            await process_incoming_sms(from_number, message, to_number, lead, new_lead_id)
+        except Exception as e:
+            print(f"❌ Error processing SMS from {from_number}: {e}")
+
+def get_leads_by_phone(phone_numbers: List[str]) -> Dict[str, sqlite3.Row]:
+    """Look up leads for several phone numbers with a single query"""
+    phone_numbers = list(set(phone_numbers))
+    placeholders = ", ".join("?" for _ in phone_numbers)
+    
+    conn = get_db_connection()
+    try:
+        leads = conn.execute(
+            f"""SELECT id, phone, first_name, last_name, email, property_address, property_type, campaign_id
+                FROM leads WHERE phone IN ({placeholders})""",
+            phone_numbers
+        ).fetchall()
+    finally:
+        conn.close()
+    
+    return {lead["phone"]: lead for lead in leads}
+
+@lru_cache(maxsize=1)
+def get_conversation_graph():
+    """Build the compiled LangGraph once per process; it holds no per-call state"""
+    from langgraph_complete import create_complete_real_estate_graph
+    return create_complete_real_estate_graph()
+
+async def process_incoming_sms(from_number: str, message: str, to_number: str, lead: Optional[sqlite3.Row],
+                               new_lead_id: Optional[str] = None):
     """Process incoming SMS through the AI system"""
     try:
-        # Import your LangGraph system
-        from langgraph_complete import create_complete_real_estate_graph
         from schemas.agent_state import create_initial_state
         
         # Find or create lead based on phone number
-        conn = get_db_connection()
-        
-        # Look for existing lead
-        lead = conn.execute(
-            "SELECT * FROM leads WHERE phone = ?", (from_number,)
-        ).fetchone()
-        
         if lead:
             # Create state for existing lead
             state = create_initial_state(
-                lead_id=lead[0],
-                lead_name=f"{lead[1]} {lead[2]}",
-                property_address=lead[5],
-                property_type=lead[6],
-                campaign_id=lead[7],
+                lead_id=lead["id"],
+                lead_name=f"{lead['first_name']} {lead['last_name']}",
+                property_address=lead["property_address"],
+                property_type=lead["property_type"],
+                campaign_id=lead["campaign_id"],
                 lead_phone=from_number,
-                lead_email=lead[4] if lead[4] else ""
+                lead_email=lead["email"] or ""
             )
         else:
             # Create new lead for unknown number
-            lead_id = str(uuid.uuid4())
+            lead_id = new_lead_id or str(uuid.uuid4())
             state = create_initial_state(
                 lead_id=lead_id,
                 lead_name="New Lead",
@@ -850,8 +1005,7 @@ async def process_incoming_sms(from_number: str, message: str, to_number: str):
         state["conversation_mode"] = "inbound_response"
         state["incoming_message"] = message
         
-        graph = create_complete_real_estate_graph()
-        result = graph.invoke(state)
+        result = await get_conversation_graph().ainvoke(state)
         
         print(f"✅ AI processing complete")
         print(f"📊 Stage: {result.get('conversation_stage', 'unknown')}")
@@ -906,8 +1060,6 @@ async def process_incoming_sms(from_number: str, message: str, to_number: str):
             else:
                 print(f"⚠️ No response generated by LangGraph system")
         
-        conn.close()
-        
     except Exception as e:
         print(f"❌ Error processing SMS: {e}")
         import traceback
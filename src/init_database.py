@@ -119,6 +119,11 @@ def init_complete_database():
         """)
         print("  ✅ messages table created")
         
+        # Per-lead message stats: seek conversations by lead, then read messages from the index alone
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_conv_lead ON conversations(lead_id, id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_msg_conv ON messages(conversation_id, method, ai_generated, timestamp)")
+        print("  ✅ indexes created")
+        
         conn.commit()
         print("  ✅ All tables created successfully!")
         
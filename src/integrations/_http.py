@@ -0,0 +1,27 @@
+from typing import Optional
+
+import httpx
+
+# Process-wide HTTP client shared by the REST integrations (Telnyx, Google Calendar)
+# so connections and TLS sessions are reused across calls instead of reopened per request
+_client: Optional[httpx.AsyncClient] = None
+
+async def get_client() -> httpx.AsyncClient:
+    """Get the shared async HTTP client, creating it on first use"""
+    global _client
+
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(max_keepalive_connections=50, max_connections=100),
+            timeout=10
+        )
+
+    return _client
+
+async def aclose_client():
+    """Close the shared HTTP client (call on application shutdown)"""
+    global _client
+
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -2,12 +2,13 @@ import os
 import json
 from typing import Dict, Any, Optional, List
 from datetime import datetime, timedelta
-import requests
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
 from google_auth_oauthlib.flow import Flow
 import logging
 
+from ._http import get_client
+
 class GoogleMeetIntegration:
     def __init__(self):
         self.credentials_file = os.getenv("GOOGLE_CREDENTIALS_FILE", "credentials.json")
@@ -134,7 +135,8 @@ class GoogleMeetIntegration:
             url = 'https://www.googleapis.com/calendar/v3/calendars/primary/events'
             params = {'conferenceDataVersion': 1}
             
-            response = requests.post(
+            client = await get_client()
+            response = await client.post(
                 url, 
                 headers=headers, 
                 params=params,
@@ -191,7 +193,9 @@ class GoogleMeetIntegration:
                 'orderBy': 'startTime'
             }
             
-            response = requests.get(url, headers=headers, params=params)
+            client = await get_client()
+            
+            response = await client.get(url, headers=headers, params=params)
             response.raise_for_status()
             
             events = response.json().get('items', [])
@@ -240,7 +244,9 @@ class GoogleMeetIntegration:
             
             url = f'https://www.googleapis.com/calendar/v3/calendars/primary/events/{event_id}'
             
-            response = requests.delete(url, headers=headers)
+            client = await get_client()
+            
+            response = await client.delete(url, headers=headers)
             response.raise_for_status()
             
             return True
@@ -262,7 +268,9 @@ class GoogleMeetIntegration:
             
             url = f'https://www.googleapis.com/calendar/v3/calendars/primary/events/{event_id}'
             
-            response = requests.get(url, headers=headers)
+            client = await get_client()
+            
+            response = await client.get(url, headers=headers)
             response.raise_for_status()
             
             event = response.json()
@@ -1,9 +1,11 @@
 import os
-import requests
+import httpx
 from typing import Dict, Any, Optional, List
 import logging
 import json
 
+from ._http import get_client
+
 class TelnyxIntegration:
     def __init__(self):
         self.api_key = os.getenv("TELNYX_API_KEY")
@@ -34,7 +36,9 @@ class TelnyxIntegration:
                 "messaging_profile_id": self.messaging_profile_id
             }
             
-            response = requests.post(url, headers=self.headers, json=payload)
+            client = await get_client()
+            
+            response = await client.post(url, headers=self.headers, json=payload)
             response.raise_for_status()
             
             result = response.json()
@@ -43,7 +47,7 @@ class TelnyxIntegration:
             self.logger.info(f"SMS sent successfully to {to_number}, ID: {message_id}")
             return True
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             self.logger.error(f"Telnyx error sending SMS to {to_number}: {e}")
             return False
         except Exception as e:
@@ -55,7 +59,9 @@ class TelnyxIntegration:
         try:
             url = f"{self.base_url}/messages/{message_id}"
             
-            response = requests.get(url, headers=self.headers)
+            client = await get_client()
+            
+            response = await client.get(url, headers=self.headers)
             response.raise_for_status()
             
             result = response.json()
@@ -72,7 +78,7 @@ class TelnyxIntegration:
                 "received_at": data.get("received_at")
             }
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             self.logger.error(f"Error fetching message status for {message_id}: {e}")
             return None
     
@@ -86,7 +92,9 @@ class TelnyxIntegration:
                 "page[size]": limit
             }
             
-            response = requests.get(url, headers=self.headers, params=params)
+            client = await get_client()
+            
+            response = await client.get(url, headers=self.headers, params=params)
             response.raise_for_status()
             
             result = response.json()
@@ -104,7 +112,7 @@ class TelnyxIntegration:
                 for msg in messages
             ]
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             self.logger.error(f"Error fetching incoming messages: {e}")
             return []
     
@@ -143,13 +151,15 @@ class TelnyxIntegration:
                 "webhook_failover_url": f"{webhook_url}/failover"
             }
             
-            response = requests.patch(url, headers=self.headers, json=payload)
+            client = await get_client()
+            
+            response = await client.patch(url, headers=self.headers, json=payload)
             response.raise_for_status()
             
             self.logger.info(f"Webhook configured successfully: {webhook_url}")
             return True
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             self.logger.error(f"Error setting up webhook: {e}")
             return False
     
@@ -158,7 +168,9 @@ class TelnyxIntegration:
         try:
             url = f"{self.base_url}/balance"
             
-            response = requests.get(url, headers=self.headers)
+            client = await get_client()
+            
+            response = await client.get(url, headers=self.headers)
             response.raise_for_status()
             
             result = response.json()
@@ -170,7 +182,7 @@ class TelnyxIntegration:
                 "credit_limit": data.get("credit_limit")
             }
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             self.logger.error(f"Error fetching account balance: {e}")
             return None
     
@@ -179,13 +191,15 @@ class TelnyxIntegration:
         try:
             url = f"{self.base_url}/messaging_profiles/{self.messaging_profile_id}"
             
-            response = requests.get(url, headers=self.headers)
+            client = await get_client()
+            
+            response = await client.get(url, headers=self.headers)
             response.raise_for_status()
             
             result = response.json()
             return result.get("data", {})
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             self.logger.error(f"Error fetching messaging profile: {e}")
             return None
     
@@ -1,4 +1,6 @@
 import os
+import asyncio
+import csv
 import pandas as pd
 from typing import Dict, Any, Optional, List
 import uuid
@@ -10,6 +12,13 @@ from models.lead import Lead, LeadStatus, PropertyType
 from utils.database import DatabaseManager
 from compliance.compliance_checker import ComplianceChecker
 
+# Columns written by CSV exports, in file order
+CSV_EXPORT_COLUMNS = [
+    'id', 'first_name', 'last_name', 'phone', 'email',
+    'property_address', 'property_type', 'property_value',
+    'status', 'interest_level', 'created_at'
+]
+
 class LeadProcessor:
     def __init__(self):
         self.db = DatabaseManager()
@@ -58,10 +67,11 @@ class LeadProcessor:
             # Read file based on extension
             file_extension = os.path.splitext(csv_file_path)[1].lower()
             
+            # Keep phones as text so numeric-looking values aren't mangled into floats
             if file_extension == '.csv':
-                df = pd.read_csv(csv_file_path)
+                df = pd.read_csv(csv_file_path, dtype={'phone': 'string'})
             elif file_extension in ['.xlsx', '.xls']:
-                df = pd.read_excel(csv_file_path)
+                df = pd.read_excel(csv_file_path, dtype={'phone': 'string'})
             else:
                 return {"error": "Unsupported file format. Use CSV or Excel files."}
             
@@ -75,16 +85,32 @@ class LeadProcessor:
             # Clean and standardize column names
             df.columns = df.columns.str.lower().str.strip()
             
+            # Normalize all phone numbers in one pass; rows without a valid number are skipped
+            valid_df = self._normalize_phone_column(df)
+            invalid_phones = len(df) - len(valid_df)
+            
             # Convert DataFrame to list of dictionaries
-            csv_leads = df.to_dict('records')
+            csv_leads = valid_df.to_dict('records')
             
             self.logger.info(f"Processing {len(csv_leads)} leads from file: {csv_file_path}")
-            return await self._process_lead_batch(csv_leads, campaign_id, property_type, "csv")
+            results = await self._process_lead_batch(csv_leads, campaign_id, property_type, "csv", phones_normalized=True)
+            results["skipped"] += invalid_phones
+            return results
             
         except Exception as e:
             self.logger.error(f"CSV/Excel import failed: {str(e)}")
             return {"error": f"File import failed: {str(e)}", "imported": 0, "skipped": 0}
     
+    def _normalize_phone_column(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Normalize the phone column to E.164 with the manual-import rules and drop rows without a valid number"""
+        raw_phones = df['phone'].astype('string').str.strip()
+        
+        # Lead files repeat numbers, so each distinct value goes through the compliance normalizer once
+        normalized = {phone: self.compliance._normalize_phone(phone) for phone in raw_phones.dropna().unique()}
+        phones = raw_phones.map(normalized).astype('string')
+        
+        return df.assign(phone=phones)[phones.notna()]
+    
     async def _import_manual_leads(self, data: Dict[str, Any], campaign_id: str, property_type: PropertyType) -> Dict[str, Any]:
         """Import manually provided leads"""
         try:
@@ -98,50 +124,74 @@ class LeadProcessor:
         except Exception as e:
             return {"error": f"Manual import failed: {str(e)}", "imported": 0, "skipped": 0}
     
-    async def _process_lead_batch(self, leads_data: List[Dict[str, Any]], campaign_id: str, property_type: PropertyType, source: str) -> Dict[str, Any]:
+    async def _process_lead_batch(self, leads_data: List[Dict[str, Any]], campaign_id: str, property_type: PropertyType, source: str, phones_normalized: bool = False) -> Dict[str, Any]:
         """Process a batch of leads and save to database"""
         imported = 0
         skipped = 0
         errors = []
-        
+
+        # Validated leads waiting to be written
+        pending_leads: List[Lead] = []
+        pending_phones = set()
+
         for lead_data in leads_data:
             try:
                 # Normalize lead data
-                normalized_lead = self._normalize_lead_data(lead_data, campaign_id, property_type, source)
-                
+                normalized_lead = self._normalize_lead_data(lead_data, campaign_id, property_type, source, phones_normalized)
+
                 if not normalized_lead:
                     skipped += 1
                     continue
-                
-                # Check if lead already exists
+
+                # Check if lead already exists (in database or earlier in this batch)
+                if normalized_lead.phone in pending_phones:
+                    skipped += 1
+                    continue
+
                 existing_lead = await self.db.get_lead_by_phone(normalized_lead.phone)
                 if existing_lead:
                     skipped += 1
                     continue
-                
+
                 # Run compliance checks
                 if not self._validate_lead_compliance(normalized_lead):
                     skipped += 1
                     continue
-                
-                # Save lead to database
-                lead_id = await self.db.create_lead(normalized_lead)
-                
+
+                pending_leads.append(normalized_lead)
+                pending_phones.add(normalized_lead.phone)
+
+            except Exception as e:
+                errors.append(f"Error processing lead: {str(e)}")
+
+        # Save leads to database - one transaction for the whole batch
+        if len(pending_leads) > 1:
+            try:
+                lead_ids = await self.db.create_leads_bulk(pending_leads)
+                imported += len(lead_ids)
+                pending_leads = []
+            except Exception as e:
+                self.logger.warning(f"Bulk insert failed, falling back to per-lead inserts: {str(e)}")
+
+        for lead in pending_leads:
+            try:
+                lead_id = await self.db.create_lead(lead)
+
                 if lead_id:
                     imported += 1
                 else:
-                    errors.append(f"Failed to save lead: {normalized_lead.phone}")
-                
+                    errors.append(f"Failed to save lead: {lead.phone}")
+
             except Exception as e:
                 errors.append(f"Error processing lead: {str(e)}")
-        
+
         return {
             "imported": imported,
             "skipped": skipped,
             "errors": errors
         }
     
-    def _normalize_lead_data(self, raw_data: Dict[str, Any], campaign_id: str, property_type: PropertyType, source: str) -> Optional[Lead]:
+    def _normalize_lead_data(self, raw_data: Dict[str, Any], campaign_id: str, property_type: PropertyType, source: str, phone_normalized: bool = False) -> Optional[Lead]:
         """Normalize raw lead data into Lead model"""
         try:
             # Extract phone number (try different field names)
@@ -153,8 +203,9 @@ class LeadProcessor:
             if not phone:
                 return None
             
-            # Normalize phone number
-            phone = self.compliance._normalize_phone(phone)
+            # Normalize phone number (already done in bulk for file imports)
+            if not phone_normalized:
+                phone = self.compliance._normalize_phone(phone)
             if not phone:
                 return None
             
@@ -279,52 +330,33 @@ class LeadProcessor:
     
     async def export_leads(self, campaign_id: str, format: str = "csv") -> str:
         """Export leads to file"""
-        leads = await self.db.get_leads_by_campaign(campaign_id)
-        
         if format == "csv":
-            return await self._export_to_csv(leads, campaign_id)
+            return await self._export_to_csv(campaign_id)
         elif format == "json":
+            leads = await self.db.get_leads_by_campaign(campaign_id)
             return await self._export_to_json(leads, campaign_id)
         else:
             raise ValueError(f"Unsupported export format: {format}")
     
-    async def _export_to_csv(self, leads: List[Lead], campaign_id: str) -> str:
+    async def _export_to_csv(self, campaign_id: str) -> str:
         """Export leads to CSV file"""
-        import csv
-        
         filename = f"leads_{campaign_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
         filepath = os.path.join("exports", filename)
         
         # Create exports directory if it doesn't exist
         os.makedirs("exports", exist_ok=True)
         
-        with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = [
-                'id', 'first_name', 'last_name', 'phone', 'email',
-                'property_address', 'property_type', 'property_value',
-                'status', 'interest_level', 'created_at'
-            ]
-            
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            
-            for lead in leads:
-                writer.writerow({
-                    'id': lead.id,
-                    'first_name': lead.first_name,
-                    'last_name': lead.last_name,
-                    'phone': lead.phone,
-                    'email': lead.email,
-                    'property_address': lead.property_address,
-                    'property_type': lead.property_type.value,
-                    'property_value': lead.property_value,
-                    'status': lead.status.value,
-                    'interest_level': lead.interest_level,
-                    'created_at': lead.created_at.isoformat()
-                })
+        await asyncio.to_thread(self._write_csv_export, filepath, campaign_id)
         
         return filepath
     
+    def _write_csv_export(self, filepath: str, campaign_id: str):
+        """Stream campaign rows from the database cursor into the CSV file"""
+        with open(filepath, 'w', newline='', encoding='utf-8', buffering=1 << 20) as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(CSV_EXPORT_COLUMNS)
+            writer.writerows(self.db.iter_campaign_lead_rows(campaign_id, CSV_EXPORT_COLUMNS))
+    
     async def _export_to_json(self, leads: List[Lead], campaign_id: str) -> str:
         """Export leads to JSON file"""
         filename = f"leads_{campaign_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
@@ -333,18 +365,8 @@ class LeadProcessor:
         # Create exports directory if it doesn't exist
         os.makedirs("exports", exist_ok=True)
         
-        leads_data = []
-        for lead in leads:
-            lead_dict = lead.dict()
-            # Convert datetime objects to strings
-            lead_dict['created_at'] = lead.created_at.isoformat()
-            lead_dict['updated_at'] = lead.updated_at.isoformat()
-            if lead.last_contact_date:
-                lead_dict['last_contact_date'] = lead.last_contact_date.isoformat()
-            if lead.next_follow_up_date:
-                lead_dict['next_follow_up_date'] = lead.next_follow_up_date.isoformat()
-            
-            leads_data.append(lead_dict)
+        # Serialize in pydantic-core; datetimes come out as ISO strings
+        leads_data = [lead.model_dump(mode="json") for lead in leads]
         
         with open(filepath, 'w', encoding='utf-8') as jsonfile:
             json.dump(leads_data, jsonfile, indent=2, ensure_ascii=False)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 from enum import Enum
@@ -24,6 +24,8 @@ class ContactMethod(str, Enum):
     PHONE = "phone"
 
 class Lead(BaseModel):
+    model_config = ConfigDict(use_enum_values=True)
+    
     id: Optional[str] = None
     
     # Contact Information
@@ -62,9 +64,6 @@ class Lead(BaseModel):
     # Timestamps
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
-    
-    class Config:
-        use_enum_values = True
 
 class ConversationMessage(BaseModel):
     timestamp: datetime = Field(default_factory=datetime.utcnow)
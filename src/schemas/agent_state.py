@@ -3,8 +3,8 @@ Real Estate Agent State Schema for LangGraph
 Defines the state structure for stateful conversations
 """
 
-from typing import TypedDict, List, Optional, Literal, Dict, Any
-from datetime import datetime
+from typing import TypedDict, List, Optional, Literal, Dict, Any, Set
+from datetime import datetime, timedelta
 from langgraph.graph import MessagesState
 
 
@@ -94,6 +94,12 @@ class RealEstateAgentState(MessagesState):
     sms_failed: bool
     email_failed: bool
     total_messages_sent: int
+    # Rolling per-day counters maintained by add_communication_attempt
+    counters_day: Optional[str]
+    sms_count_today: int
+    email_count_today: int
+    last_sms_failure_ts: Optional[float]
+    last_email_failure_ts: Optional[float]
     
     # Conversation State
     conversation_stage: Literal[
@@ -130,6 +136,7 @@ class RealEstateAgentState(MessagesState):
     
     # Analytics & Tracking
     conversation_started_at: str
+    conversation_started_epoch: int  # same instant as conversation_started_at, for cheap elapsed-time checks
     last_updated_at: str
     total_conversation_time: Optional[int]  # in minutes
     response_time_avg: Optional[float]  # in seconds
@@ -137,10 +144,12 @@ class RealEstateAgentState(MessagesState):
     # Agent Routing
     current_agent: Optional[str]
     agent_history: List[str]
+    agent_history_set: Set[str]  # membership index for agent_history
     next_action: Optional[str]
     
     # Error Handling
     last_error: Optional[str]
+    last_error_lc: Optional[str]  # last_error lowercased once when set, for escalation keyword checks
     retry_count: int
     
     # Custom Fields
@@ -160,7 +169,8 @@ def create_initial_state(
     """
     Create initial state for a new conversation
     """
-    now = datetime.now().isoformat()
+    started = datetime.now()
+    now = started.isoformat()
     
     return RealEstateAgentState(
         # Messages (from MessagesState)
@@ -185,6 +195,11 @@ def create_initial_state(
         sms_failed=False,
         email_failed=False,
         total_messages_sent=0,
+        counters_day=None,
+        sms_count_today=0,
+        email_count_today=0,
+        last_sms_failure_ts=None,
+        last_email_failure_ts=None,
         
         # Conversation State
         conversation_stage="initial",
@@ -238,6 +253,7 @@ def create_initial_state(
         
         # Analytics & Tracking
         conversation_started_at=now,
+        conversation_started_epoch=int(started.timestamp()),
         last_updated_at=now,
         total_conversation_time=None,
         response_time_avg=None,
@@ -245,10 +261,12 @@ def create_initial_state(
         # Agent Routing
         current_agent=None,
         agent_history=[],
+        agent_history_set=set(),
         next_action=None,
         
         # Error Handling
         last_error=None,
+        last_error_lc=None,
         retry_count=0,
         
         # Custom Fields
@@ -262,6 +280,68 @@ def update_state_timestamp(state: RealEstateAgentState) -> RealEstateAgentState:
     return state
 
 
+def record_agent_visit(state: RealEstateAgentState, agent_name: str) -> RealEstateAgentState:
+    """Append an agent to agent_history the first time it handles the conversation"""
+    seen = state.get("agent_history_set")
+    if seen is None:
+        # State built before agent_history_set existed
+        seen = state["agent_history_set"] = set(state["agent_history"])
+    
+    if agent_name not in seen:
+        seen.add(agent_name)
+        state["agent_history"].append(agent_name)
+    
+    return state
+
+
+# Longest recent-failure window checked against the counters (SMS: 24h)
+FAILURE_LOOKBACK = timedelta(hours=24)
+
+
+def refresh_communication_counters(
+    state: RealEstateAgentState,
+    now: Optional[datetime] = None
+) -> RealEstateAgentState:
+    """Bring the per-day SMS/email counters up to date for today"""
+    now = now or datetime.now()
+    today = now.date().isoformat()
+    
+    if "counters_day" not in state:
+        # State built before the counters existed - rebuild them once from the history. Attempts are
+        # appended in time order, so walk newest-first and stop once past both today and the longest
+        # failure window anything checks.
+        cutoff = min(
+            now.replace(hour=0, minute=0, second=0, microsecond=0),
+            now - FAILURE_LOOKBACK
+        )
+        sms_count = email_count = 0
+        last_failure = {"sms": None, "email": None}
+        for attempt in reversed(state["communication_attempts"]):
+            ts = datetime.fromisoformat(attempt["timestamp"])
+            if ts < cutoff:
+                break
+            method = attempt["method"]
+            if ts.date().isoformat() == today:
+                if method == "sms":
+                    sms_count += 1
+                elif method == "email":
+                    email_count += 1
+            if not attempt["success"] and method in last_failure and last_failure[method] is None:
+                last_failure[method] = ts.timestamp()
+        
+        state["counters_day"] = today
+        state["sms_count_today"] = sms_count
+        state["email_count_today"] = email_count
+        state["last_sms_failure_ts"] = last_failure["sms"]
+        state["last_email_failure_ts"] = last_failure["email"]
+    elif state["counters_day"] != today:
+        state["counters_day"] = today
+        state["sms_count_today"] = 0
+        state["email_count_today"] = 0
+    
+    return state
+
+
 def add_communication_attempt(
     state: RealEstateAgentState,
     method: Literal["sms", "email"],
@@ -272,9 +352,12 @@ def add_communication_attempt(
 ) -> RealEstateAgentState:
     """Add a communication attempt to the state"""
     
+    now = datetime.now()
+    refresh_communication_counters(state, now)
+    
     attempt = CommunicationAttempt(
         method=method,
-        timestamp=datetime.now().isoformat(),
+        timestamp=now.isoformat(),
         message=message,
         success=success,
         message_id=message_id,
@@ -287,11 +370,18 @@ def add_communication_attempt(
     state["last_contact_time"] = attempt["timestamp"]
     state["total_messages_sent"] += 1
     
+    if method == "sms":
+        state["sms_count_today"] += 1
+    else:
+        state["email_count_today"] += 1
+    
     if not success:
         if method == "sms":
             state["sms_failed"] = True
+            state["last_sms_failure_ts"] = now.timestamp()
         else:
             state["email_failed"] = True
+            state["last_email_failure_ts"] = now.timestamp()
     
     return update_state_timestamp(state)
 
@@ -4,6 +4,7 @@ Handles SMS sending, delivery tracking, and webhook processing
 """
 
 import os
+import re
 import telnyx
 import logging
 from typing import Dict, Any, Optional, List
@@ -42,7 +43,7 @@ class TelnyxSMSService:
         self, 
         to_number: str, 
         message: str, 
-        state: RealEstateAgentState,
+        state: Optional[RealEstateAgentState] = None,
         media_urls: List[str] = None
     ) -> Dict[str, Any]:
         """
@@ -51,7 +52,8 @@ class TelnyxSMSService:
         Args:
             to_number: Recipient phone number (E.164 format)
             message: SMS message content
-            state: Current conversation state
+            state: Current conversation state (None for sends outside a graph run; the
+                caller then records the attempt itself)
             media_urls: Optional list of media URLs for MMS
             
         Returns:
@@ -107,20 +109,21 @@ class TelnyxSMSService:
             self.logger.info(f"SMS sent successfully - ID: {message_id}, Status: {status}")
             
             # Update state with communication attempt
-            add_communication_attempt(
-                state,
-                method="sms",
-                message=message,
-                success=True,
-                message_id=message_id
-            )
+            if state is not None:
+                add_communication_attempt(
+                    state,
+                    method="sms",
+                    message=message,
+                    success=True,
+                    message_id=message_id
+                )
             
             # Store delivery status for tracking
             self.delivery_statuses[message_id] = {
                 "status": status,
                 "sent_at": datetime.now().isoformat(),
                 "to_number": to_number,
-                "lead_id": state["lead_id"]
+                "lead_id": state["lead_id"] if state is not None else None
             }
             
             return {
@@ -136,13 +139,14 @@ class TelnyxSMSService:
             self.logger.error(error_msg)
             
             # Update state with failed attempt
-            add_communication_attempt(
-                state,
-                method="sms",
-                message=message,
-                success=False,
-                error=error_msg
-            )
+            if state is not None:
+                add_communication_attempt(
+                    state,
+                    method="sms",
+                    message=message,
+                    success=False,
+                    error=error_msg
+                )
             
             return {
                 "success": False,
@@ -411,8 +415,6 @@ def format_phone_number(phone_number: str) -> str:
     """
     Format phone number to E.164 format
     """
-    import re
-    
     # Remove all non-digit characters
     digits = re.sub(r'\D', '', phone_number)
     
@@ -424,6 +426,12 @@ def format_phone_number(phone_number: str) -> str:
     return "+" + digits
 
 
+# Spam keywords flagged by validate_sms_content. The lookahead alternation finds every keyword
+# substring (overlapping ones included) in one pass over the lowercased message.
+_SPAM_KEYWORDS = ("free", "winner", "urgent", "act now", "limited time")
+_SPAM_KEYWORD_PATTERN = re.compile("(?=(" + "|".join(re.escape(keyword) for keyword in _SPAM_KEYWORDS) + "))")
+
+
 def validate_sms_content(message: str) -> Dict[str, Any]:
     """
     Validate SMS message content for compliance and deliverability
@@ -434,14 +442,16 @@ def validate_sms_content(message: str) -> Dict[str, Any]:
     if len(message) > 1600:
         issues.append("Message too long (max 1600 characters)")
     
-    # Check for spam keywords (basic check)
-    spam_keywords = ["free", "winner", "urgent", "act now", "limited time"]
-    for keyword in spam_keywords:
-        if keyword.lower() in message.lower():
+    message_lower = message.lower()
+    
+    # Check for spam keywords (basic check), reported in _SPAM_KEYWORDS order
+    found = set(_SPAM_KEYWORD_PATTERN.findall(message_lower))
+    for keyword in _SPAM_KEYWORDS:
+        if keyword in found:
             issues.append(f"Potential spam keyword detected: {keyword}")
     
     # Check for required opt-out language for marketing messages
-    if "stop" not in message.lower() and "opt" not in message.lower():
+    if "stop" not in message_lower and "opt" not in message_lower:
         issues.append("Consider adding opt-out instructions (Reply STOP to opt out)")
     
     return {
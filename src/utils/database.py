@@ -1,22 +1,57 @@
 import os
+import asyncio
 import sqlite3
 import json
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 import uuid
+import threading
+from cachetools import TTLCache
 
 from models.lead import Lead, LeadStatus, PropertyType
 
+INSERT_LEAD_SQL = """
+    INSERT INTO leads (
+        id, first_name, last_name, phone, email,
+        property_address, property_type, property_value, property_condition,
+        source, source_data, campaign_id, status,
+        conversation_history, last_contact_date, next_follow_up_date,
+        qualification_data, interest_level, opted_out, dnc_checked,
+        created_at, updated_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Recently read leads keyed by (database path, phone) - a lead in conversation replies several times
+# in a few minutes. Module level so every DatabaseManager sees the others' writes; entries are
+# private copies and each hit hands out a fresh one, so callers can't mutate the cached lead.
+LEAD_CACHE_SECONDS = 300
+_LEADS_BY_PHONE = TTLCache(maxsize=10000, ttl=LEAD_CACHE_SECONDS)
+# (database path, lead id) -> cached phone, so an update that changes the phone drops the old entry
+_PHONES_BY_LEAD_ID = TTLCache(maxsize=10000, ttl=LEAD_CACHE_SECONDS)
+_LEAD_CACHE_LOCK = threading.Lock()
+
 class DatabaseManager:
     def __init__(self):
         self.db_path = os.getenv("DATABASE_URL", "sqlite:///./leads.db").replace("sqlite:///", "")
         self._init_database()
     
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection with the per-connection performance PRAGMAs applied"""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute("PRAGMA cache_size=-65536")
+        return conn
+    
     def _init_database(self):
         """Initialize database tables"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             
+            # WAL is persistent in the database file - readers no longer block on writers
+            cursor.execute("PRAGMA journal_mode=WAL")
+            
             # Create leads table
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS leads (
@@ -45,6 +80,9 @@ class DatabaseManager:
                 )
             """)
             
+            # Campaign lookups and per-status stats; phone lookups use the UNIQUE index on phone
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_leads_campaign_status ON leads(campaign_id, status)")
+            
             # Create campaigns table
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS campaigns (
@@ -81,36 +119,52 @@ class DatabaseManager:
         lead.created_at = datetime.utcnow()
         lead.updated_at = datetime.utcnow()
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT INTO leads (
-                    id, first_name, last_name, phone, email,
-                    property_address, property_type, property_value, property_condition,
-                    source, source_data, campaign_id, status,
-                    conversation_history, last_contact_date, next_follow_up_date,
-                    qualification_data, interest_level, opted_out, dnc_checked,
-                    created_at, updated_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                lead.id, lead.first_name, lead.last_name, lead.phone, lead.email,
-                lead.property_address, lead.property_type.value, lead.property_value, lead.property_condition,
-                lead.source, json.dumps(lead.source_data), lead.campaign_id, lead.status.value,
-                json.dumps(lead.conversation_history), 
-                lead.last_contact_date.isoformat() if lead.last_contact_date else None,
-                lead.next_follow_up_date.isoformat() if lead.next_follow_up_date else None,
-                json.dumps(lead.qualification_data), lead.interest_level, lead.opted_out, lead.dnc_checked,
-                lead.created_at.isoformat(), lead.updated_at.isoformat()
-            ))
-            
+            cursor.execute(INSERT_LEAD_SQL, self._lead_to_params(lead))
             conn.commit()
         
+        self._invalidate_cached_lead(lead)
         return lead.id
     
+    async def create_leads_bulk(self, leads: List[Lead]) -> List[str]:
+        """Create multiple leads in a single transaction"""
+        now = datetime.utcnow()
+        for lead in leads:
+            if not lead.id:
+                lead.id = str(uuid.uuid4())
+            lead.created_at = now
+            lead.updated_at = now
+        
+        params = [self._lead_to_params(lead) for lead in leads]
+        await asyncio.to_thread(self._insert_leads, params)
+        
+        for lead in leads:
+            self._invalidate_cached_lead(lead)
+        
+        return [lead.id for lead in leads]
+    
+    def _insert_leads(self, params: List[tuple]):
+        """Insert lead rows with one executemany; rolls back entirely on failure"""
+        with self._connect() as conn:
+            conn.executemany(INSERT_LEAD_SQL, params)
+    
+    def _lead_to_params(self, lead: Lead) -> tuple:
+        """Convert Lead object to INSERT_LEAD_SQL parameters"""
+        return (
+            lead.id, lead.first_name, lead.last_name, lead.phone, lead.email,
+            lead.property_address, PropertyType(lead.property_type).value, lead.property_value, lead.property_condition,
+            lead.source, json.dumps(lead.source_data), lead.campaign_id, LeadStatus(lead.status).value,
+            json.dumps(lead.conversation_history), 
+            lead.last_contact_date.isoformat() if lead.last_contact_date else None,
+            lead.next_follow_up_date.isoformat() if lead.next_follow_up_date else None,
+            json.dumps(lead.qualification_data), lead.interest_level, lead.opted_out, lead.dnc_checked,
+            lead.created_at.isoformat(), lead.updated_at.isoformat()
+        )
+    
     async def get_lead_by_id(self, lead_id: str) -> Optional[Lead]:
         """Get lead by ID"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             
@@ -124,7 +178,12 @@ class DatabaseManager:
     
     async def get_lead_by_phone(self, phone: str) -> Optional[Lead]:
         """Get lead by phone number"""
-        with sqlite3.connect(self.db_path) as conn:
+        with _LEAD_CACHE_LOCK:
+            cached = _LEADS_BY_PHONE.get((self.db_path, phone))
+        if cached is not None:
+            return cached.model_copy(deep=True)
+        
+        with self._connect() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             
@@ -132,7 +191,11 @@ class DatabaseManager:
             row = cursor.fetchone()
             
             if row:
-                return self._row_to_lead(row)
+                lead = self._row_to_lead(row)
+                with _LEAD_CACHE_LOCK:
+                    _LEADS_BY_PHONE[(self.db_path, phone)] = lead.model_copy(deep=True)
+                    _PHONES_BY_LEAD_ID[(self.db_path, lead.id)] = phone
+                return lead
         
         return None
     
@@ -140,7 +203,7 @@ class DatabaseManager:
         """Update existing lead"""
         lead.updated_at = datetime.utcnow()
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             
             cursor.execute("""
@@ -164,11 +227,21 @@ class DatabaseManager:
             ))
             
             conn.commit()
-            return cursor.rowcount > 0
+        
+        self._invalidate_cached_lead(lead)
+        return cursor.rowcount > 0
+    
+    def _invalidate_cached_lead(self, lead: Lead):
+        """Drop a written lead from the shared cache under its new and previously cached phone"""
+        with _LEAD_CACHE_LOCK:
+            _LEADS_BY_PHONE.pop((self.db_path, lead.phone), None)
+            cached_phone = _PHONES_BY_LEAD_ID.pop((self.db_path, lead.id), None)
+            if cached_phone is not None:
+                _LEADS_BY_PHONE.pop((self.db_path, cached_phone), None)
     
     async def get_leads_by_campaign(self, campaign_id: str) -> List[Lead]:
         """Get all leads for a campaign"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             
@@ -177,11 +250,21 @@ class DatabaseManager:
             
             return [self._row_to_lead(row) for row in rows]
     
+    def iter_campaign_lead_rows(self, campaign_id: str, columns: List[str]):
+        """Yield raw lead rows for a campaign straight from the cursor (for streaming exports)"""
+        conn = self._connect()
+        try:
+            yield from conn.execute(
+                f"SELECT {', '.join(columns)} FROM leads WHERE campaign_id = ?", (campaign_id,)
+            )
+        finally:
+            conn.close()
+    
     async def get_leads_for_follow_up(self) -> List[Lead]:
         """Get leads that need follow-up"""
         now = datetime.utcnow().isoformat()
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             
@@ -197,31 +280,24 @@ class DatabaseManager:
     
     async def get_campaign_stats(self, campaign_id: str) -> Dict[str, Any]:
         """Get campaign statistics"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             
-            # Total leads
-            cursor.execute("SELECT COUNT(*) FROM leads WHERE campaign_id = ?", (campaign_id,))
-            total_leads = cursor.fetchone()[0]
-            
-            # Leads by status
+            # Leads and responses by status in one pass
             cursor.execute("""
-                SELECT status, COUNT(*) 
+                SELECT status, COUNT(*), SUM(json_array_length(conversation_history) > 0)
                 FROM leads 
                 WHERE campaign_id = ? 
                 GROUP BY status
             """, (campaign_id,))
             
-            status_counts = dict(cursor.fetchall())
-            
-            # Response rate
-            cursor.execute("""
-                SELECT COUNT(*) FROM leads 
-                WHERE campaign_id = ? 
-                AND json_array_length(conversation_history) > 0
-            """, (campaign_id,))
+            status_counts = {}
+            responded = 0
+            for status, count, status_responded in cursor.fetchall():
+                status_counts[status] = count
+                responded += status_responded or 0
             
-            responded = cursor.fetchone()[0]
+            total_leads = sum(status_counts.values())
             response_rate = (responded / total_leads * 100) if total_leads > 0 else 0
             
             return {
@@ -262,7 +338,7 @@ class DatabaseManager:
         """Log compliance event"""
         log_id = str(uuid.uuid4())
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             
             cursor.execute("""